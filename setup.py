@@ -35,6 +35,7 @@ setup(
         "google-cloud-monitoring",
         "tensorflow",
         "psutil",
+        "numpy",
         "click",
         "pysimdjson",
         "tpunicorn",
@@ -0,0 +1,11 @@
+import os
+import importlib.util
+
+
+def load_module(name):
+    # load by path: importing the tpubar package pulls in tensorflow and auth setup
+    path = os.path.join(os.path.dirname(__file__), os.pardir, 'tpubar', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(f'tpubar_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import load_module
+
+accounting = load_module('accounting')
+
+
+def test_fraction_below():
+    assert accounting.fraction_below(5.0, 8.0, 10.0) == 1.0
+    assert accounting.fraction_below(20.0, 30.0, 10.0) == 0.0
+    assert accounting.fraction_below(0.0, 20.0, 10.0) == pytest.approx(0.5)
+    assert accounting.fraction_below(40.0, 0.0, 10.0) == pytest.approx(0.25)
+    assert accounting.fraction_below(10.0, 10.0, 10.0) == 0.0
+
+
+def test_integrates_trapezoids_and_thresholds():
+    integrator = accounting.UtilizationIntegrator(thresholds=(10.0, 50.0), max_gap_secs=3600)
+    integrator.add(0, 0.0, 100.0)
+    integrator.add(3600, 100.0, 0.0)
+    integrator.add(5400, 100.0, 0.0)
+    stats = integrator.stats()
+    assert stats['tpu_tracked_hours'] == pytest.approx(1.5)
+    assert stats['tpu_mxu_hours'] == pytest.approx(0.5 + 0.5)
+    assert stats['tpu_idle_hours'] == pytest.approx(0.5)
+    # 0 -> 100% over the first hour is under 10% for 6 mins and under 50% for 30 mins
+    assert stats['tpu_below_10_per'] == pytest.approx(100 * 0.1 / 1.5)
+    assert stats['tpu_below_50_per'] == pytest.approx(100 * 0.5 / 1.5)
+
+
+def test_gaps_and_out_of_order_samples():
+    integrator = accounting.UtilizationIntegrator(max_gap_secs=300)
+    integrator.add(0, 50.0, 0.0)
+    integrator.add(60, 50.0, 0.0)
+    integrator.add(30, 0.0, 100.0)
+    integrator.add(1060, 50.0, 0.0)
+    stats = integrator.stats()
+    assert stats['tpu_tracked_hours'] == pytest.approx(60 / 3600)
+    assert stats['tpu_gap_hours'] == pytest.approx(1000 / 3600)
+    assert stats['tpu_mxu_hours'] == pytest.approx(30 / 3600)
+
+
+def test_v1_idle_from_zero_mxu():
+    integrator = accounting.UtilizationIntegrator(idle_mxu=1.0)
+    integrator.add(0, 0.0)
+    integrator.add(100, 0.5)
+    integrator.add(200, 80.0)
+    assert integrator.stats()['tpu_idle_hours'] == pytest.approx((100 + 50) / 3600)
+
+
+def test_summary_from_stats():
+    integrator = accounting.UtilizationIntegrator(thresholds=(10.0,), max_gap_secs=3600)
+    integrator.add(0, 5.0, 0.0)
+    integrator.add(3600, 5.0, 0.0)
+    summary = integrator.summary()
+    assert summary == accounting.efficiency_summary(integrator.stats())
+    assert '1.00 hrs tracked' in summary and '100.0% of time under 10% MXU' in summary
+    assert 'without data' not in summary
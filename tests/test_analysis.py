@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import load_module
+
+np = pytest.importorskip('numpy')
+
+analysis = load_module('analysis')
+
+
+def brute_lagged_correlation(x, y, lag):
+    return np.corrcoef(x[:len(x) - lag], y[lag:])[0, 1]
+
+
+def test_lagged_correlation_matches_corrcoef():
+    rng = np.random.RandomState(0)
+    x = rng.randn(200)
+    y = rng.randn(200)
+    lags, corr = analysis.lagged_correlation(x, y, 20)
+    assert list(lags) == list(range(21))
+    for lag in lags:
+        assert corr[lag] == pytest.approx(brute_lagged_correlation(x, y, lag), abs=1e-9)
+
+
+def test_lagged_correlation_finds_lead():
+    rng = np.random.RandomState(1)
+    x = rng.randn(300)
+    y = np.roll(x, 7) + 0.1 * rng.randn(300)
+    lags, corr = analysis.lagged_correlation(x, y, 30)
+    assert int(lags[np.argmax(np.abs(corr))]) == 7
+
+
+def test_lagged_correlation_short_input():
+    for n in range(3):
+        lags, corr = analysis.lagged_correlation(np.ones(n), np.ones(n), 10)
+        assert len(lags) == 0 and len(corr) == 0
+    lags, corr = analysis.lagged_correlation(np.arange(5.0), np.arange(5.0), 10)
+    assert list(lags) == [0, 1, 2]
@@ -0,0 +1,71 @@
+import pytest
+
+from conftest import load_module
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('google.api.metric_pb2')
+
+rates = load_module('rates')
+
+
+def test_delta_rate():
+    t, r = rates.delta_rate([0, 60, 120, 180], [60, 120, 180, 180], [600, 1200, 0, 5])
+    assert list(t) == [60, 120, 180]
+    assert list(r) == [10, 20, 0]
+
+
+def test_cumulative_rate_resets():
+    # value drop at 140 is a reset, and a new start_time at 150 is another
+    t, r = rates.cumulative_rate([0, 0, 0, 150], [60, 120, 140, 200], [100, 300, 50, 100])
+    assert list(t) == [120, 140, 200]
+    assert r == pytest.approx([200 / 60, 50 / 20, 100 / 50])
+
+
+def test_cumulative_rate_unsorted():
+    t, r = rates.cumulative_rate([0, 0, 0], [120, 60, 180], [300, 100, 600])
+    assert list(t) == [120, 180]
+    assert r == pytest.approx([200 / 60, 300 / 60])
+
+
+def test_counter_rate_short_input():
+    t, r = rates.counter_rate([0], [60], [100], kind='cumulative')
+    assert len(t) == 0 and len(r) == 0
+    t, r = rates.counter_rate([], [], [], kind='delta')
+    assert len(t) == 0 and len(r) == 0
+
+
+def test_latest_total_rate():
+    assert rates.latest_total_rate({'a': [[120, 1.0], [60, 2.0]], 'b': [[60, 3.0]], 'c': []}) == 5.0
+
+
+def make_series(kind, instance, points, loadbalanced='false'):
+    monitoring_v3 = pytest.importorskip('google.cloud.monitoring_v3')
+    return monitoring_v3.TimeSeries({
+        'metric': {'type': 'compute.googleapis.com/instance/network/received_bytes_count', 'labels': {'instance_name': instance, 'loadbalanced': loadbalanced}},
+        'metric_kind': kind,
+        'value_type': rates.MetricDescriptor.ValueType.INT64,
+        # the API returns points newest first
+        'points': [{'interval': {'start_time': {'seconds': s}, 'end_time': {'seconds': e}}, 'value': {'int64_value': v}} for s, e, v in reversed(points)],
+    })
+
+
+def test_decode_rates_time_series():
+    kinds = rates.MetricDescriptor.MetricKind
+    results = [
+        make_series(kinds.DELTA, 'vm-a', [(0, 60, 600), (60, 120, 1200)]),
+        make_series(kinds.CUMULATIVE, 'vm-b', [(0, 60, 100), (0, 120, 700), (0, 180, 1300)]),
+    ]
+    decoded = rates.decode_rates(results, 200, lambda series: series.metric.labels['instance_name'])
+    assert decoded['vm-a'] == [[140, 10.0], [80, 20.0]]
+    assert decoded['vm-b'] == [[80, 10.0], [20, 10.0]]
+
+
+def test_decode_rates_keeps_series_with_the_same_label():
+    kinds = rates.MetricDescriptor.MetricKind
+    results = [
+        make_series(kinds.DELTA, 'vm-a', [(0, 60, 600)], loadbalanced='true'),
+        make_series(kinds.DELTA, 'vm-a', [(0, 60, 60)], loadbalanced='false'),
+    ]
+    decoded = rates.decode_rates(results, 60, lambda series: series.metric.labels['instance_name'])
+    assert sorted(decoded) == ['vm-a', 'vm-a/2']
+    assert rates.latest_total_rate(decoded) == 11.0
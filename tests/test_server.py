@@ -0,0 +1,94 @@
+import os
+import time
+import socket
+import tempfile
+
+import pytest
+
+from conftest import load_module
+
+server = load_module('server')
+
+
+class FakeMonitor:
+    mesh = 'v3-8'
+    profiler_ver = 'v1'
+    tpu_max_mem = 1e+9
+    cpu = 'test'
+    refresh_secs = 0.1
+
+
+@pytest.fixture
+def socket_path():
+    # unix socket paths are limited to ~100 characters, so stay out of pytest's deep tmp_path
+    path = os.path.join(tempfile.mkdtemp(), 'tpubar.sock')
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def wait_for(check, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if check():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_client_reads_published_stats(socket_path):
+    srv = server.SnapshotServer(FakeMonitor(), socket_path)
+    srv.start()
+    try:
+        client = server.SnapshotClient(socket_path)
+        assert client.header['mesh'] == 'v3-8'
+        srv.publish({'tpu_mxu': 42.0})
+        assert wait_for(lambda: client().get('tpu_mxu') == 42.0)
+        client.close()
+    finally:
+        srv.close()
+
+
+def test_client_raises_when_server_stops_publishing(socket_path):
+    srv = server.SnapshotServer(FakeMonitor(), socket_path)
+    srv.start()
+    try:
+        client = server.SnapshotClient(socket_path, stale_refreshes=2)
+        srv.publish({'tpu_mxu': 42.0})
+        assert wait_for(lambda: client.latest is not None)
+        time.sleep(0.3)
+        with pytest.raises(RuntimeError):
+            client()
+        client.close()
+    finally:
+        srv.close()
+
+
+def test_second_server_refuses_running_socket(socket_path):
+    srv = server.SnapshotServer(FakeMonitor(), socket_path)
+    srv.start()
+    try:
+        with pytest.raises(RuntimeError):
+            server.SnapshotServer(FakeMonitor(), socket_path).start()
+        assert server.server_running(socket_path)
+    finally:
+        srv.close()
+
+
+def test_server_replaces_stale_socket(socket_path):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    assert not server.server_running(socket_path)
+    srv = server.SnapshotServer(FakeMonitor(), socket_path)
+    srv.start()
+    try:
+        assert server.server_running(socket_path)
+    finally:
+        srv.close()
+
+
+def test_default_socket_path_uses_tpu_name(monkeypatch):
+    monkeypatch.delenv('TPU_NAME', raising=False)
+    assert server.default_socket_path('mytpu').endswith('tpubar-mytpu.sock')
+    assert server.default_socket_path().endswith('tpubar-default.sock')
@@ -0,0 +1,47 @@
+import pytest
+
+from conftest import load_module
+
+np = pytest.importorskip('numpy')
+
+sparkline = load_module('sparkline')
+
+
+def test_sparkline_incremental_matches_full():
+    rng = np.random.RandomState(2)
+    points = [(float(i), float(v)) for i, v in enumerate(rng.rand(1000) * 100)]
+    incremental = sparkline.Sparkline(window_secs=1200, width=40)
+    for i in range(0, len(points), 7):
+        incremental.add(points[i:i + 7])
+    full = sparkline.Sparkline(window_secs=1200, width=40)
+    full.add(points)
+    assert incremental.values() == full.values()
+    incremental.resize(25)
+    full = sparkline.Sparkline(window_secs=1200, width=25)
+    full.add(points)
+    assert incremental.values() == full.values()
+
+
+def test_sparkline_keeps_spikes():
+    points = [(float(i), 50.0) for i in range(1200)]
+    points[600] = (600.0, 100.0)
+    points[900] = (900.0, 0.0)
+    line = sparkline.Sparkline(window_secs=1200, width=40)
+    line.add(points)
+    values = line.values()
+    assert 100.0 in values and 0.0 in values
+
+
+def test_sparkline_drops_old_points():
+    line = sparkline.Sparkline(window_secs=100, width=10)
+    line.add([(float(i), 100.0) for i in range(100)])
+    line.add([(float(i), 0.0) for i in range(100, 300)])
+    assert line.values() == [0.0] * 10
+    assert line.add([(50.0, 100.0)]) is None and line.values() == [0.0] * 10
+
+
+def test_sparkline_render():
+    line = sparkline.Sparkline(window_secs=30, width=3, vmin=0.0, vmax=100.0)
+    line.add([(0.0, 0.0), (10.0, 50.0), (20.0, 100.0)])
+    rendered = line.render()
+    assert len(rendered) == 3 and rendered[0] < rendered[1] < rendered[2]
@@ -0,0 +1,46 @@
+import glob
+import time
+
+import pytest
+
+from conftest import load_module
+
+pytest.importorskip('tensorboard')
+
+tensorboard = load_module('tensorboard')
+
+
+def read_scalars(logdir):
+    from tensorboard.backend.event_processing.event_file_loader import LegacyEventFileLoader
+    events = []
+    for path in glob.glob(f'{logdir}/events.out.tfevents.*'):
+        events += [e for e in LegacyEventFileLoader(path).Load() if e.summary.value]
+    return events
+
+
+def test_exporter_keeps_wall_time_and_monotonic_steps(tmp_path):
+    exporter = tensorboard.TensorBoardExporter(str(tmp_path), flush_secs=60)
+    before = time.time()
+    exporter({'tpu_mxu': 10.0, 'train_steps': 0, 'tpu_mxu_str': 'ignored'})
+    exporter({'tpu_mxu': 20.0, 'train_steps': 50})
+    exporter({'tpu_mxu': 30.0, 'train_steps': 20})
+    exporter({'tpu_mxu': 40.0, 'train_steps': 100, 'flag': True})
+    recorded = time.time()
+    time.sleep(0.2)
+    exporter.close()
+
+    events = read_scalars(tmp_path)
+    assert [e.step for e in events] == [1, 50, 51, 100]
+    # recorded when the sample was enqueued, not when the batch was written on close
+    assert all(before <= e.wall_time <= recorded for e in events)
+    tags = {v.tag: v.simple_value for v in events[-1].summary.value}
+    assert tags == {'tpubar/tpu_mxu': 40.0, 'tpubar/train_steps': 100.0}
+
+
+def test_exporter_drops_when_full(tmp_path):
+    exporter = tensorboard.TensorBoardExporter(str(tmp_path), flush_secs=60, max_queue=2)
+    for i in range(5):
+        exporter({'tpu_mxu': float(i)})
+    assert exporter.dropped == 3
+    exporter.close()
+    assert len(read_scalars(tmp_path)) == 2
@@ -0,0 +1,73 @@
+import pytest
+
+from conftest import load_module
+
+throughput = load_module('throughput')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(throughput, 'time', clock)
+    return clock
+
+
+def test_collect_windowed_rates(clock):
+    tracker = throughput.StepTracker(window_secs=60)
+    for i in range(11):
+        clock.now = i * 0.5
+        tracker.step(n_examples=32)
+    stats = tracker.collect(tpu_mxu=40.0)
+    assert stats['train_steps'] == 11 and stats['train_examples'] == 352
+    # the first step only marks the start of the 5 sec span
+    assert stats['steps_per_sec'] == pytest.approx(2.0)
+    assert stats['examples_per_sec'] == pytest.approx(64.0)
+    assert stats['step_time_ms'] == pytest.approx(500.0)
+    assert stats['step_jitter_ms'] == pytest.approx(0.0)
+    assert stats['examples_per_mxu'] == pytest.approx(1.6)
+    assert '2.00 steps/s' in throughput.throughput_str(stats)
+
+
+def test_jitter_and_multi_steps(clock):
+    tracker = throughput.StepTracker()
+    for t, n in [(0.0, 1), (1.0, 1), (4.0, 1), (6.0, 2)]:
+        clock.now = t
+        tracker.step(n_steps=n)
+    stats = tracker.collect()
+    assert stats['train_steps'] == 5
+    assert stats['steps_per_sec'] == pytest.approx(4 / 6)
+    # step intervals of 1, 3 and 1 (2 secs over 2 steps)
+    assert stats['step_time_ms'] == pytest.approx(5000 / 3)
+    assert stats['step_jitter_ms'] == pytest.approx(1000 * (8 / 9) ** 0.5)
+    assert 'examples_per_mxu' not in stats
+
+
+def test_old_steps_leave_the_window(clock):
+    tracker = throughput.StepTracker(window_secs=10)
+    for t in [0.0, 1.0, 2.0]:
+        clock.now = t
+        tracker.step()
+    clock.now = 100.0
+    stats = tracker.collect()
+    assert stats == {'train_steps': 3, 'train_examples': 0}
+    assert throughput.throughput_str(stats) == '3 steps'
+
+
+def test_pending_is_bounded(clock):
+    tracker = throughput.StepTracker(max_pending=100)
+    for i in range(1000):
+        clock.now = i * 0.01
+        tracker.step()
+    assert len(tracker._pending) == 100
+    stats = tracker.collect()
+    assert stats['train_steps'] == 100
+    assert stats['steps_per_sec'] == pytest.approx(100.0)
+    assert not tracker._pending
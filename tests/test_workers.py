@@ -0,0 +1,76 @@
+import time
+import threading
+
+from conftest import load_module
+
+workers = load_module('workers')
+
+
+def make_probe(delays, mxus=None):
+    def probe(worker):
+        time.sleep(delays.get(worker, 0.0))
+        return {'tpu_mxu': (mxus or {}).get(worker, 50.0), 'tpu_idle_time': 10.0}
+    return probe
+
+
+def test_many_slow_workers_are_not_stragglers():
+    names = [f'w{i}' for i in range(64)]
+    prober = workers.WorkerProber(names, make_probe({w: 0.2 for w in names}), timeout_secs=0.5)
+    try:
+        for _ in range(3):
+            stats = prober.worker_stats(prober.probe_all())
+            assert stats['tpu_stragglers'] == []
+            assert all(stats['tpu_workers'][w] for w in names)
+    finally:
+        prober.close()
+
+
+def test_hung_worker_times_out_without_delaying_others():
+    release = threading.Event()
+
+    def probe(worker):
+        if worker == 'hung':
+            release.wait(5)
+        return {'tpu_mxu': 50.0, 'tpu_idle_time': 10.0}
+
+    prober = workers.WorkerProber(['a', 'b', 'hung'], probe, timeout_secs=0.2)
+    try:
+        start = time.perf_counter()
+        results = prober.probe_all()
+        assert time.perf_counter() - start < 1.0
+        assert results['hung'] is None and results['a'] and results['b']
+        assert prober.worker_stats(results)['tpu_stragglers'] == ['hung']
+        # the hung probe is still running, so it is not resubmitted and its deadline has already passed
+        start = time.perf_counter()
+        results = prober.probe_all()
+        assert time.perf_counter() - start < 0.2
+        assert results['hung'] is None
+        release.set()
+        time.sleep(0.05)
+        assert prober.probe_all()['hung']
+    finally:
+        release.set()
+        prober.close()
+
+
+def test_queued_probes_are_unprobed_not_stragglers():
+    prober = workers.WorkerProber(['a', 'b', 'c'], make_probe({'a': 0.4, 'b': 0.4, 'c': 0.0}), max_workers=2, timeout_secs=0.2)
+    try:
+        results = prober.probe_all()
+        stats = prober.worker_stats(results)
+        assert results['c'] is None
+        assert stats['tpu_unprobed_workers'] == ['c']
+        assert 'c' not in stats['tpu_stragglers']
+    finally:
+        prober.close()
+
+
+def test_mxu_stragglers_and_skew():
+    prober = workers.WorkerProber(['a', 'b', 'c'], make_probe({}, {'a': 50.0, 'b': 48.0, 'c': 20.0}), timeout_secs=1.0)
+    try:
+        stats = prober.worker_stats(prober.probe_all())
+        assert stats['tpu_stragglers'] == ['c']
+        assert stats['tpu_worker_mxu_skew'] == 30.0
+        assert stats['tpu_worker_idle_skew'] == 0.0
+    finally:
+        prober.close()
@@ -26,10 +26,8 @@ def update_auth(updated_auths):
     json.dump(updated_auths, open(env['auth_path'], 'w'), indent=1)
 
 if auths.get('DEFAULT_ADC', None):
-    if auths['DEFAULT_ADC'] == 'implicit':
-        import google.auth
-        creds, project_id = google.auth.default()
-    else:
+    # implicit credentials are resolved lazily, once per process, by tpubar.network.get_default_credentials
+    if auths['DEFAULT_ADC'] != 'implicit':
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = auths['DEFAULT_ADC']
 
 elif os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', None):
@@ -78,6 +76,7 @@ def set_auth(auth_name):
         auths['DEFAULT_ADC'] = auths[auth_name]
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = auths[auth_name]
         update_auth(auths)
+        tpubar.network.clear_client_pool()
     else:
         print(f'Not able to find {auth_name} in Auth File. Update it first using "tpu auth {auth_name}".')
 
@@ -0,0 +1,74 @@
+
+def fraction_below(a, b, threshold):
+    # fraction of a linear segment from a to b that lies below threshold
+    if a < threshold and b < threshold:
+        return 1.00
+    if a >= threshold and b >= threshold:
+        return 0.00
+    if a < threshold:
+        return (threshold - a) / (b - a)
+    return (threshold - b) / (a - b)
+
+
+class UtilizationIntegrator:
+    """Streaming integral of MXU utilization and idle time over the life of a monitor.
+
+    Samples may arrive at any interval; each interval is integrated with the trapezoid rule.
+    Intervals longer than `max_gap_secs` are counted as gaps instead of being interpolated
+    across, and only running totals are kept, so memory stays constant.
+    """
+    def __init__(self, thresholds=(10.00, 50.00), max_gap_secs=300, idle_mxu=1.00):
+        self.thresholds = [float(t) for t in thresholds]
+        self.max_gap_secs = max_gap_secs
+        self.idle_mxu = idle_mxu
+        self.last = None
+        self.tracked_secs = 0.00
+        self.gap_secs = 0.00
+        self.mxu_secs = 0.00
+        self.idle_secs = 0.00
+        self.below_secs = {t: 0.00 for t in self.thresholds}
+
+    def add(self, timestamp, tpu_mxu, tpu_idle_time=None):
+        if tpu_idle_time is None:
+            # v1 has no idle signal, so count time with (near) zero MXU as idle
+            tpu_idle_time = 100.00 if tpu_mxu < self.idle_mxu else 0.00
+        sample = (timestamp, tpu_mxu, tpu_idle_time)
+        if self.last:
+            dt = timestamp - self.last[0]
+            if dt <= 0:
+                return
+            if dt > self.max_gap_secs:
+                self.gap_secs += dt
+            else:
+                _, prev_mxu, prev_idle = self.last
+                self.tracked_secs += dt
+                self.mxu_secs += dt * (prev_mxu + tpu_mxu) / 200.00
+                self.idle_secs += dt * (prev_idle + tpu_idle_time) / 200.00
+                for t in self.thresholds:
+                    self.below_secs[t] += dt * fraction_below(prev_mxu, tpu_mxu, t)
+        self.last = sample
+
+    def stats(self):
+        stats = {
+            'tpu_tracked_hours': self.tracked_secs / 3600,
+            'tpu_gap_hours': self.gap_secs / 3600,
+            'tpu_mxu_hours': self.mxu_secs / 3600,
+            'tpu_idle_hours': self.idle_secs / 3600,
+        }
+        for t in self.thresholds:
+            stats[f'tpu_below_{t:g}_per'] = 100.00 * self.below_secs[t] / self.tracked_secs if self.tracked_secs else 0.00
+        return stats
+
+    def summary(self):
+        return efficiency_summary(self.stats())
+
+
+def efficiency_summary(stats):
+    # works from the stats dict, so attached viewers can summarize the collector's totals
+    msg = f"TPU Efficiency: {stats['tpu_tracked_hours']:.2f} hrs tracked | {stats['tpu_mxu_hours']:.2f} effective MXU hrs | {stats['tpu_idle_hours']:.2f} idle hrs"
+    if stats.get('tpu_gap_hours', 0.00):
+        msg += f" | {stats['tpu_gap_hours']:.2f} hrs without data"
+    for key in stats:
+        if key.startswith('tpu_below_') and key.endswith('_per'):
+            msg += f" | {stats[key]:.1f}% of time under {key[len('tpu_below_'):-len('_per')]}% MXU"
+    return msg
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+_counter_metrics = ['vm_net_sent', 'vm_net_recv', 'vm_disk_write', 'vm_disk_read', 'tpu_host_net_sent', 'tpu_host_net_recv']
+_default_drivers = ['tpu_host_net_recv', 'vm_net_recv', 'vm_disk_read', 'vm_cpu', 'tpu_host_cpu']
+# fewer aligned points than this can't say anything useful about a lead time
+_min_points = 10
+
+
+def series_arrays(points, when):
+    # [[seconds_ago, value], ...] from TimeSeriesMonitor into time sorted (t, v) arrays
+    arr = np.asarray(points, dtype=float).reshape(-1, 2)
+    t = when - arr[:, 0]
+    order = np.argsort(t)
+    return t[order], arr[order, 1]
+
+
+def align_series(series, step_secs=60):
+    """Interpolates {name: (t, v)} onto a common grid covering the span where every series has data"""
+    start = max(t[0] for t, _ in series.values())
+    end = min(t[-1] for t, _ in series.values())
+    if end <= start:
+        raise ValueError('Series do not overlap in time')
+    grid = np.arange(start, end + step_secs / 2, step_secs)
+    return grid, {name: np.interp(grid, t, v) for name, (t, v) in series.items()}
+
+
+def combine_series(series, step_secs=60, reduce='mean'):
+    # several devices/workers of one metric become one signal on their shared grid
+    grid, aligned = align_series(series, step_secs)
+    stacked = np.vstack(list(aligned.values()))
+    return grid, stacked.sum(axis=0) if reduce == 'sum' else stacked.mean(axis=0)
+
+
+def lagged_correlation(x, y, max_lag):
+    """Pearson correlation of x[t - lag] with y[t] for every lag in 0..max_lag, where x leads y.
+
+    Cross products for all lags come from one FFT, and the per-lag means and variances from
+    cumulative sums, so the whole curve costs O(n log n). Lags leave at least 3 pairs, so
+    fewer than 3 points return empty arrays.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    max_lag = min(max_lag, n - 3)
+    if max_lag < 0:
+        return np.empty(0, dtype=int), np.empty(0)
+    lags = np.arange(max_lag + 1)
+    size = 1 << int(np.ceil(np.log2(2 * n)))
+    sxy = np.fft.irfft(np.conj(np.fft.rfft(x, size)) * np.fft.rfft(y, size), size)[lags]
+
+    # pairs for lag k are x[:n-k] and y[k:]
+    cx, cxx = np.cumsum(x), np.cumsum(x * x)
+    cy, cyy = np.cumsum(y[::-1]), np.cumsum((y * y)[::-1])
+    nk = n - lags
+    sx, sxx = cx[nk - 1], cxx[nk - 1]
+    sy, syy = cy[nk - 1], cyy[nk - 1]
+    cov = nk * sxy - sx * sy
+    var = (nk * sxx - sx * sx) * (nk * syy - sy * sy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.where(var > 0, cov / np.sqrt(np.maximum(var, 0)), 0.00)
+    return lags, corr
+
+
+def fetch_signal(monitor, metric, interval, when, node_id=None, filters=None, step_secs=60):
+    if metric in _counter_metrics:
+        points = monitor.get_rates(metric, node_id=node_id, interval=interval, filters=filters, when=when)
+        reduce = 'sum'
+    else:
+        points = monitor.get(metric, node_id=node_id, interval=interval, filters=filters, when=when)
+        reduce = 'mean'
+    series = {k: series_arrays(v, when) for k, v in points.items() if len(v) > 1}
+    if not series:
+        return None
+    return combine_series(series, step_secs, reduce)
+
+
+def correlate(monitor, target='tpu_core_mxu', drivers=None, window_secs=86400, step_secs=60, max_lag_secs=1800, node_id=None, vm_filters=None):
+    """Finds which host side signal best leads `target`, and by how much.
+
+    TPU metrics are filtered by node_id and VM metrics by vm_filters. Returns per driver results
+    with the correlation and lead time at the strongest lag, plus the overall strongest driver.
+    Drivers that overlap the target for fewer than `_min_points` steps are skipped.
+    """
+    from tpubar.network import make_interval, utc
+    when = utc()
+    interval = make_interval(window_secs)
+    drivers = drivers or _default_drivers
+    filters_for = lambda metric: vm_filters if metric.startswith('vm_') else None
+    node_for = lambda metric: node_id if metric.startswith('tpu_') else None
+
+    target_signal = fetch_signal(monitor, target, interval, when, node_for(target), filters_for(target), step_secs)
+    if target_signal is None:
+        raise ValueError(f'No data found for {target}')
+    report = {'target': target, 'drivers': {}, 'strongest': None}
+    for driver in drivers:
+        driver_signal = fetch_signal(monitor, driver, interval, when, node_for(driver), filters_for(driver), step_secs)
+        if driver_signal is None:
+            continue
+        try:
+            grid, aligned = align_series({'driver': driver_signal, 'target': target_signal}, step_secs)
+        except ValueError:
+            continue
+        if len(grid) < _min_points:
+            continue
+        lags, corr = lagged_correlation(aligned['driver'], aligned['target'], int(max_lag_secs // step_secs))
+        if not len(corr):
+            continue
+        best = int(np.argmax(np.abs(corr)))
+        report['drivers'][driver] = {'corr': float(corr[best]), 'lead_secs': int(lags[best] * step_secs), 'zero_lag_corr': float(corr[0])}
+
+    if report['drivers']:
+        report['strongest'] = max(report['drivers'], key=lambda d: abs(report['drivers'][d]['corr']))
+    return report
+
+
+def correlate_str(report):
+    lines = [f"Lagged correlation of host signals leading {report['target']}"]
+    for driver, res in sorted(report['drivers'].items(), key=lambda d: -abs(d[1]['corr'])):
+        lines.append(f"- {driver}: r={res['corr']:+.3f} leading by {res['lead_secs'] / 60:.1f} mins (r={res['zero_lag_corr']:+.3f} at no lag)")
+    if report['strongest']:
+        res = report['drivers'][report['strongest']]
+        lines.append(f"Strongest driver: {report['strongest']} (r={res['corr']:+.3f}, {res['lead_secs'] / 60:.1f} mins ahead)")
+    else:
+        lines.append('No driver signals had data in this window')
+    return '\n'.join(lines)
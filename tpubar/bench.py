@@ -0,0 +1,48 @@
+import os
+import time
+
+
+def synthetic_step(work=20000):
+    # pure python work, so it contends for the GIL the same way an input pipeline does
+    total = 0
+    for i in range(work):
+        total += i * i
+    return total
+
+
+def time_steps(num_steps, work):
+    times = []
+    for _ in range(num_steps):
+        start = time.perf_counter()
+        synthetic_step(work)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize_steps(times):
+    times = sorted(times)
+    return {
+        'mean_ms': 1000 * sum(times) / len(times),
+        'p50_ms': 1000 * times[len(times) // 2],
+        'p95_ms': 1000 * times[int(len(times) * 0.95)],
+        'max_ms': 1000 * times[-1],
+    }
+
+
+def benchmark_collectors(tpu_name=None, project=None, profiler='v1', refresh_secs=1, num_steps=2000, work=20000, modes=('thread', 'process')):
+    from tpubar.monitor import TPUMonitor
+    results = {'baseline': summarize_steps(time_steps(num_steps, work))}
+    devnull = open(os.devnull, 'w')
+    for mode in modes:
+        monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler=profiler, refresh_secs=refresh_secs, fileout=devnull, collector=mode)
+        monitor.start()
+        # let the collector reach steady state before timing
+        time.sleep(refresh_secs * 2)
+        results[mode] = summarize_steps(time_steps(num_steps, work))
+        monitor.close()
+    devnull.close()
+
+    baseline = results['baseline']['mean_ms']
+    for mode in modes:
+        results[mode]['overhead_per'] = 100.00 * (results[mode]['mean_ms'] - baseline) / baseline
+    return results
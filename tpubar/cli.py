@@ -16,30 +16,40 @@ def cli(ctx, **kws):
 @click.argument('tpu_name', type=click.STRING, default=os.environ.get('TPU_NAME', None))
 @click.option('--project', type=click.STRING, default=None)
 @click.option('-v', '--verbose', is_flag=True)
-def monitor_tpubar(tpu_name, project, verbose):
+@click.option('-a', '--attach', is_flag=True, help='Render stats from a running "tpubar serve" instead of polling the TPU')
+@click.option('--socket', 'socket_path', type=click.STRING, default=None)
+@click.option('--profile-self', 'profile_self', is_flag=True, help='Periodically print how long each stage of a poll takes')
+def monitor_tpubar(tpu_name, project, verbose, attach, socket_path, profile_self):
     tpu_name = tpu_name if tpu_name else os.environ.get('TPU_NAME', None)
     from tpubar import TPUMonitor, env, auths
+    from tpubar.server import default_socket_path
     if not tpu_name:
         tpu_name = click.prompt('Please enter a TPU Name', type=click.STRING)
         if not tpu_name:
             raise ValueError('Valid TPU Name must be selected')
     
-    elif not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', None) and not auths['DEFAULT_ADC']:
+    elif not attach and not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', None) and not auths['DEFAULT_ADC']:
         adc = click.prompt('Please enter a path to GOOGLE_APPLICATION_CREDENTIALS', type=click.STRING)
         if adc:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = adc
     
     click.echo(f'Monitoring TPU: {tpu_name} until cancelled.')
     
-    if env['colab']:
-        monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler='v1', refresh_secs=3, verbose=verbose)
+    if attach:
+        monitor = TPUMonitor(tpu_name=tpu_name, refresh_secs=1, verbose=verbose, attach=socket_path or default_socket_path(tpu_name), profile_self=profile_self)
+    elif env['colab']:
+        monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler='v1', refresh_secs=3, verbose=verbose, profile_self=profile_self)
     else:
-        monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler='v1', refresh_secs=3, verbose=verbose)
+        monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler='v1', refresh_secs=3, verbose=verbose, profile_self=profile_self)
 
     monitor.start()
+    idx = 0
     while True:
         try:
             time.sleep(10)
+            idx += 1
+            if profile_self and idx % 6 == 0:
+                monitor.log(monitor.timer.report_str())
         except KeyboardInterrupt:
             click.echo(f'\nShutting Down Monitor')
             monitor.close()
@@ -48,20 +58,25 @@ def monitor_tpubar(tpu_name, project, verbose):
 @cli.command('test')
 @click.argument('tpu_name', type=click.STRING, default=os.environ.get('TPU_NAME', None))
 @click.option('--project', type=click.STRING, default=None)
-def test_tpubar(tpu_name, project):
+@click.option('-a', '--attach', is_flag=True, help='Read stats from a running "tpubar serve" instead of polling the TPU')
+@click.option('--socket', 'socket_path', type=click.STRING, default=None)
+def test_tpubar(tpu_name, project, attach, socket_path):
     tpu_name = tpu_name if tpu_name else os.environ.get('TPU_NAME', None)
     from tpubar import TPUMonitor, env, auths
+    from tpubar.server import default_socket_path
     if not tpu_name:
         tpu_name = click.prompt('Please enter a TPU Name', type=click.STRING)
         if not tpu_name:
             raise ValueError('Valid TPU Name must be selected')
-    if not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', None) and not auths['DEFAULT_ADC']:
+    if not attach and not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', None) and not auths['DEFAULT_ADC']:
         adc = click.prompt('Please enter a path to GOOGLE_APPLICATION_CREDENTIALS', type=click.STRING)
         if adc:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = adc
     
     click.echo(f'Running Test for TPUBar on TPU {tpu_name}')
-    if env['colab']:
+    if attach:
+        monitor = TPUMonitor(tpu_name=tpu_name, refresh_secs=3, verbose=True, attach=socket_path or default_socket_path(tpu_name))
+    elif env['colab']:
         monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler='v2', refresh_secs=3, verbose=True)
     else:
         #click.echo(f'{project}')
@@ -72,6 +87,83 @@ def test_tpubar(tpu_name, project):
         time.sleep(10)
     click.echo(f'\nCompleted Testing')
 
+@cli.command('serve')
+@click.argument('tpu_name', type=click.STRING, default=os.environ.get('TPU_NAME', None))
+@click.option('--project', type=click.STRING, default=None)
+@click.option('--socket', 'socket_path', type=click.STRING, default=None)
+@click.option('--refresh_secs', type=click.INT, default=3)
+@click.option('-v', '--verbose', is_flag=True)
+def serve_tpubar(tpu_name, project, socket_path, refresh_secs, verbose):
+    tpu_name = tpu_name if tpu_name else os.environ.get('TPU_NAME', None)
+    from tpubar import TPUMonitor, env, auths
+    from tpubar.server import default_socket_path
+    if not tpu_name:
+        tpu_name = click.prompt('Please enter a TPU Name', type=click.STRING)
+        if not tpu_name:
+            raise ValueError('Valid TPU Name must be selected')
+    if not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', None) and not auths['DEFAULT_ADC']:
+        adc = click.prompt('Please enter a path to GOOGLE_APPLICATION_CREDENTIALS', type=click.STRING)
+        if adc:
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = adc
+
+    socket_path = socket_path or default_socket_path(tpu_name)
+    profiler = 'v2' if env['colab'] else 'v1'
+    monitor = TPUMonitor(tpu_name=tpu_name, project=project, profiler=profiler, refresh_secs=refresh_secs, verbose=verbose, disable=True)
+    # claim the socket before polling, so a second collector for the same socket exits right away
+    monitor.serve(socket_path)
+    monitor.start()
+    click.echo(f'Serving TPU: {tpu_name} stats on {socket_path} until cancelled. Attach with "tpubar monitor {tpu_name} --attach"')
+    while True:
+        try:
+            time.sleep(10)
+        except KeyboardInterrupt:
+            click.echo(f'\nShutting Down Server')
+            monitor.close()
+            sys.exit()
+
+@cli.command('bench')
+@click.argument('tpu_name', type=click.STRING, default=os.environ.get('TPU_NAME', None))
+@click.option('--project', type=click.STRING, default=None)
+@click.option('--profiler', type=click.Choice(['v1', 'v2']), default='v1')
+@click.option('--refresh_secs', type=click.INT, default=1)
+@click.option('--num_steps', type=click.INT, default=2000)
+def bench_tpubar(tpu_name, project, profiler, refresh_secs, num_steps):
+    tpu_name = tpu_name if tpu_name else os.environ.get('TPU_NAME', None)
+    from tpubar.bench import benchmark_collectors
+    if not tpu_name:
+        tpu_name = click.prompt('Please enter a TPU Name', type=click.STRING)
+        if not tpu_name:
+            raise ValueError('Valid TPU Name must be selected')
+
+    click.echo(f'Benchmarking step time cost of in-process vs subprocess collection on TPU {tpu_name}')
+    results = benchmark_collectors(tpu_name=tpu_name, project=project, profiler=profiler, refresh_secs=refresh_secs, num_steps=num_steps)
+    for mode, res in results.items():
+        overhead = f" | overhead {res['overhead_per']:.2f}%" if 'overhead_per' in res else ''
+        click.echo(f"- {mode}: mean {res['mean_ms']:.3f}ms | p50 {res['p50_ms']:.3f}ms | p95 {res['p95_ms']:.3f}ms | max {res['max_ms']:.3f}ms{overhead}")
+
+@cli.command('correlate')
+@click.argument('tpu_name', type=click.STRING, default=os.environ.get('TPU_NAME', None))
+@click.option('--project', type=click.STRING, default=None)
+@click.option('--vm', 'vm_name', type=click.STRING, default=None, help='VM instance name for host metrics, defaults to this host')
+@click.option('--hours', type=click.FLOAT, default=24.0)
+@click.option('--max_lag_mins', type=click.FLOAT, default=30.0)
+@click.option('--step_secs', type=click.INT, default=60)
+def correlate_tpubar(tpu_name, project, vm_name, hours, max_lag_mins, step_secs):
+    tpu_name = tpu_name if tpu_name else os.environ.get('TPU_NAME', None)
+    import socket
+    from tpubar.network import TimeSeriesMonitor
+    from tpubar.analysis import correlate, correlate_str
+    if not tpu_name:
+        tpu_name = click.prompt('Please enter a TPU Name', type=click.STRING)
+        if not tpu_name:
+            raise ValueError('Valid TPU Name must be selected')
+
+    vm_name = vm_name or socket.gethostname()
+    click.echo(f'Correlating host I/O and CPU on {vm_name} with TPU {tpu_name} MXU over the last {hours:.1f} hrs')
+    monitor = TimeSeriesMonitor(project_id=project)
+    report = correlate(monitor, window_secs=hours * 3600, step_secs=step_secs, max_lag_secs=max_lag_mins * 60, node_id=tpu_name, vm_filters=[['metric.labels.instance_name', vm_name]])
+    click.echo(correlate_str(report))
+
 @cli.command('trace')
 @click.argument('tpu_name', type=click.STRING, default=os.environ.get('TPU_NAME', None))
 @click.option('-v', '--verbose', is_flag=True)
@@ -0,0 +1,87 @@
+import multiprocessing as mp
+
+from threading import Thread
+
+
+def collector_main(conn, monitor_kwargs):
+    from tpubar.monitor import TPUMonitor
+    monitor = TPUMonitor(disable=True, **monitor_kwargs)
+    monitor.start(daemon=False)
+    conn.send({'mesh': monitor.mesh, 'profiler_ver': monitor.profiler_ver, 'tpu_max_mem': monitor.tpu_max_mem, 'cpu': monitor.cpu})
+
+    def send(stats):
+        # this is the one copy update() makes for its hooks, and nothing else holds it
+        if monitor.timer.enabled:
+            stats['collector_stages'] = monitor.stage_stats()
+        conn.send(stats)
+
+    # set directly, since add_hook would log into the parent's terminal
+    monitor.hooks['collector'] = {'freq': 1, 'func': send}
+    while True:
+        try:
+            monitor.update()
+        except (EOFError, BrokenPipeError, KeyboardInterrupt):
+            break
+        except Exception as e:
+            conn.send({'collector_error': str(e)})
+        # the parent asks us to stop (or goes away) while we wait out the refresh
+        if conn.poll(monitor.refresh_secs):
+            break
+    monitor.closebars()
+
+
+class ProcessCollector:
+    """Runs the TPU collector in a child process and streams stats back over a pipe.
+
+    Profiler RPCs, protobuf/JSON decoding and psutil sampling all happen in the child,
+    so the training process only unpickles a small dict per refresh. Calling it returns
+    the latest stats, the same way SnapshotClient does. Extra `monitor_kwargs` (io_stats,
+    efficiency_thresholds, profile_self, ...) are passed to the child's TPUMonitor.
+    """
+    def __init__(self, tpu_name=None, project=None, profiler='v1', refresh_secs=10, start_timeout=300, **monitor_kwargs):
+        ctx = mp.get_context('spawn')
+        self.conn, child_conn = ctx.Pipe()
+        monitor_kwargs.update({'tpu_name': tpu_name, 'project': project, 'profiler': profiler, 'refresh_secs': refresh_secs})
+        self.process = ctx.Process(target=collector_main, args=(child_conn, monitor_kwargs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(start_timeout):
+            self.close()
+            raise TimeoutError(f'TPU collector process did not start within {start_timeout} secs')
+        self.header = self.conn.recv()
+        self.latest = None
+        self.error = None
+        self.connected = True
+        _reader = Thread(target=self.read_snapshots, daemon=True)
+        _reader.start()
+
+    def read_snapshots(self):
+        while self.connected:
+            try:
+                stats = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            if 'collector_error' in stats:
+                self.error = stats['collector_error']
+            else:
+                self.latest = stats
+                self.error = None
+        self.connected = False
+
+    def __call__(self):
+        if not self.connected:
+            raise RuntimeError('TPU collector process exited')
+        if self.error:
+            raise RuntimeError(self.error)
+        return dict(self.latest) if self.latest else {}
+
+    def close(self):
+        self.connected = False
+        try:
+            self.conn.send('stop')
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
@@ -2,6 +2,8 @@ import os
 import sys
 import time
 import re
+import shutil
+import socket
 import psutil
 import tensorflow as tf
 
@@ -12,7 +14,18 @@ from tensorflow.python.distribute.cluster_resolver import tpu_cluster_resolver a
 from tpubar import env
 from tpubar.host import queryhw
 from tpubar.utils import FormatSize
-from tpubar.network import TimeSeriesMonitor, get_workers_list, tpunicorn_query
+from tpubar.network import TimeSeriesMonitor, get_workers_list, tpunicorn_query, utc, make_interval
+from tpubar.throughput import StepTracker, throughput_str
+from tpubar.server import SnapshotServer, SnapshotClient, default_socket_path
+from tpubar.collector import ProcessCollector
+from tpubar.sparkline import Sparkline
+from tpubar.notebook import NotebookPanel, notebook_available
+from tpubar.accounting import UtilizationIntegrator, efficiency_summary
+from tpubar.workers import WorkerProber
+from tpubar.rates import latest_total_rate
+from tpubar.tensorboard import TensorBoardExporter
+from tpubar.profiling import StageTimer
+from tpubar.snapshot import StatsSample, empty_sample
 
 
 if env['profiler']:
@@ -35,6 +48,25 @@ _mesh_memory = {
 }
 
 
+def parse_tpu_utilization(util):
+    stats = {'tpu_idle_time': 100.00, 'tpu_idle_str': '', 'tpu_mxu': 0.00, 'tpu_mxu_str': ''}
+    util = util.split('\n')
+    for stat in util:
+        if 'TPU idle time' in stat:
+            stats['tpu_idle_time'] = float(stat.split(':')[-1].replace('%','').strip())
+            stats['tpu_idle_str'] = stat.split('  ')[-1].strip()
+        elif 'Utilization of TPU' in stat:
+            stats['tpu_mxu'] = float(stat.split(':')[-1].replace('%','').strip())
+            stats['tpu_mxu_str'] = ' ' + stat.strip()
+    return stats
+
+
+# *_bytes_count metrics are sampled once a minute, so polling them faster only re-downloads the same points
+_counter_sample_secs = 60
+_counter_retry_secs = 15
+_counter_window_secs = 300
+
+
 _timer_formats = {
     'secs': ['sec', 'secs', 'second', 'seconds', 's'],
     'mins': ['min', 'mins', 'minute', 'minutes', 'm'],
@@ -46,8 +78,16 @@ _timer_formats = {
 
 
 class TPUMonitor:
-    def __init__(self, tpu_name=None, project=None, profiler='v1', refresh_secs=10, fileout=None, verbose=False, disable=False, tpu_util='green', tpu_secondary='yellow', cpu_util='blue', ram_util='blue'):
-        if profiler == 'trace':
+    def __init__(self, tpu_name=None, project=None, profiler='v1', refresh_secs=10, fileout=None, verbose=False, disable=False, tpu_util='green', tpu_secondary='yellow', cpu_util='blue', ram_util='blue', attach=None, collector='thread', sparklines=False, sparkline_secs=1200, renderer='auto', efficiency_thresholds=(10.00, 50.00), io_stats=True, profile_self=False):
+        self.attached = False
+        self.io_stats = io_stats
+        self.tpu_name = tpu_name
+        self.timer = StageTimer(enabled=profile_self)
+        if attach:
+            self.tpu_attach(default_socket_path(tpu_name) if attach is True else attach)
+        elif collector == 'process':
+            self.tpu_attach(client=ProcessCollector(tpu_name, project, profiler, refresh_secs, io_stats=io_stats, efficiency_thresholds=efficiency_thresholds, profile_self=profile_self))
+        elif profiler == 'trace':
             self.tpu_init_tf2(tpu_name)
         elif profiler in ['v1', 'v2']:
             self.tpu_init_tf2(tpu_name) if profiler == 'v2' else self.tpu_init_tf1(tpu_name, project)
@@ -60,32 +100,55 @@ class TPUMonitor:
         self.fileout = fileout or sys.stdout
         self.verbose = verbose
         self.bars_disabled = disable
+        self.renderer = renderer
+        self.panel = None
         self.colors = {
             'tpu_util': tpu_util,
             'tpu_secondary': tpu_secondary,
             'cpu_util': cpu_util,
             'ram_util': ram_util
         }
-        self.current_stats = {}
+        self._snapshot = empty_sample
+        self.throughput = StepTracker()
+        self.sbar = None
+        self.show_sparklines = sparklines
+        self.sparkline_secs = sparkline_secs
+        self.sparklines = {}
+        self.history = {}
+        self.accounting = UtilizationIntegrator(thresholds=efficiency_thresholds)
         self.hooks = {}
+        self.server = None
+        self.tensorboard = None
         self.timeout_hook = None
         self.idx = 0
         self.hwdata()
         self.time = time.time()
         self._lock = Lock()
 
+    def make_bar(self, bar_format, colour=None, position=0, total=100):
+        if self.panel:
+            return self.panel.bar(bar_format, colour, total)
+        return tqdm(total=total, colour=colour, bar_format=bar_format, position=position, dynamic_ncols=True, leave=True, file=self.fileout, disable=self.bars_disabled)
+
     def start(self, daemon=True):
-        _tpubarformat = f'TPU {self.mesh} Matrix Units: ' + '{bar} {percentage:.02f}% Utilization'
+        if not self.bars_disabled and (self.renderer == 'notebook' or (self.renderer == 'auto' and notebook_available())):
+            self.panel = NotebookPanel()
+        _tpubarformat = f'TPU {self.mesh} Matrix Units: ' + '{bar} {percentage:.02f}% Utilization {desc}'
         if self.profiler_ver == 'v2':
             _tpusecondarybarformat = f'TPU {self.mesh} Active Time: ' + '{bar} {percentage:.02f}% Utilization'  
         else:
             _tpusecondarybarformat = f'TPU {self.mesh} Memory: ' + '{desc} {bar} {percentage:.02f}% Utilization'  
         _cpubarformat = f'CPU {self.cpu}: ' + '{bar} {percentage:.02f}% Utilization'
         _rambarformat = 'RAM {desc} {bar} {percentage:.02f}% Utilization'
-        self.tbar = tqdm(range(100), colour=self.colors['tpu_util'], bar_format=_tpubarformat, position=0, dynamic_ncols=True, leave=True, file=self.fileout, disable=self.bars_disabled)
-        self.t2bar = tqdm(range(100), colour=self.colors['tpu_secondary'], bar_format=_tpusecondarybarformat, position=1, dynamic_ncols=True, leave=True, file=self.fileout, disable=self.bars_disabled)
-        self.cbar = tqdm(range(100), colour=self.colors['cpu_util'], bar_format=_cpubarformat, position=2, dynamic_ncols=True, leave=True, file=self.fileout, disable=self.bars_disabled)
-        self.rbar = tqdm(range(100), colour=self.colors['ram_util'], bar_format=_rambarformat, position=3, dynamic_ncols=True, leave=True, file=self.fileout, disable=self.bars_disabled)
+        self.tbar = self.make_bar(_tpubarformat, self.colors['tpu_util'], position=0)
+        self.t2bar = self.make_bar(_tpusecondarybarformat, self.colors['tpu_secondary'], position=1)
+        self.cbar = self.make_bar(_cpubarformat, self.colors['cpu_util'], position=2)
+        self.rbar = self.make_bar(_rambarformat, self.colors['ram_util'], position=3)
+        if self.show_sparklines:
+            _secondary = 'Active' if self.profiler_ver == 'v2' else 'Memory'
+            for x, name in enumerate(['MXU', _secondary, 'CPU', 'RAM']):
+                sparkbar = self.make_bar('{desc}', position=5+x, total=0)
+                self.sparklines[name] = (Sparkline(window_secs=self.sparkline_secs, vmin=0.00, vmax=100.00), sparkbar)
         if daemon:
             self.alive = True
             _background = Thread(target=self.background, daemon=True)
@@ -93,46 +156,131 @@ class TPUMonitor:
     
     def update(self):
         self.idx += 1
-        tpu_stats = self.tpu_profiler()
-        if tpu_stats['tpu_mxu']:
-            self.tbar.n = tpu_stats['tpu_mxu']
-            
+        timer = self.timer
+        with timer.stage('total'):
+            with timer.stage('tpu_profiler'):
+                tpu_stats = self.tpu_profiler()
+            with timer.stage('tpu_bars'):
+                if tpu_stats.get('tpu_mxu', None):
+                    self.tbar.n = tpu_stats['tpu_mxu']
+                if tpu_stats.get('io_str', None):
+                    self.tbar.set_description_str(tpu_stats['io_str'])
+
+                if self.profiler_ver == 'v2':
+                    idle_time = tpu_stats.get('tpu_idle_time', None)
+                    if idle_time:
+                        self.t2bar.n = (100.00 - idle_time)
+
+                else:
+                    tpu_mem = tpu_stats.get('tpu_mem_per', None)
+                    if tpu_mem:
+                        self.t2bar.n = tpu_mem
+                        self.t2bar.set_description(tpu_stats.get('tpu_mem_str', ''), refresh=True)
+
+            if not self.attached:
+                with timer.stage('psutil'):
+                    cpu_util = self.cpu_utilization()
+                    rperc, rutil, rutilstr = self.ram_utilization()
+                tpu_stats.update({'cpu_util': cpu_util, 'ram_per': rperc, 'ram_util': rutil, 'ram_util_str': rutilstr})
+            with timer.stage('host_bars'):
+                self.cbar.n = tpu_stats.get('cpu_util', 0.00)
+                self.rbar.n = tpu_stats.get('ram_per', 0.00)
+                self.rbar.set_description(tpu_stats.get('ram_util_str', ''), refresh=True)
+            with timer.stage('derived'):
+                # attached viewers pass the collector's totals through instead of integrating again
+                if not self.attached and tpu_stats.get('tpu_mxu', None) is not None:
+                    self.accounting.add(time.time(), tpu_stats['tpu_mxu'], tpu_stats.get('tpu_idle_time', None))
+                    tpu_stats.update(self.accounting.stats())
+                if self.throughput.active:
+                    self.update_throughput(tpu_stats)
+                if self.sparklines:
+                    self.update_sparklines(tpu_stats)
+            self.publish(tpu_stats)
+            with timer.stage('render'):
+                self.refresh_all()
+            with timer.stage('hooks'):
+                # a single copy per poll, shared by every hook (server, TensorBoard, collector), and only made if something reads it
+                if self.timeout_hook or self.hooks or self.verbose:
+                    stats = self.current_stats
+                    if self.timeout_hook:
+                        self.check_tpu_pulse(stats)
+                    self.fire_hooks(stats)
+
+    def publish(self, stats):
+        # the sample takes ownership of stats, and a single reference swap means readers never see a half updated sample
+        get = stats.get
+        self._snapshot = StatsSample(self._snapshot.seq + 1, time.time(), stats, tpu_mxu=get('tpu_mxu', None), tpu_idle_time=get('tpu_idle_time', None),
+                                     tpu_mem_per=get('tpu_mem_per', None), cpu_util=get('cpu_util', None), ram_per=get('ram_per', None),
+                                     steps_per_sec=get('steps_per_sec', None), examples_per_sec=get('examples_per_sec', None),
+                                     tpu_mxu_hours=get('tpu_mxu_hours', None), tpu_idle_hours=get('tpu_idle_hours', None))
+
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def current_stats(self):
+        return self._snapshot.as_dict()
+
+    def update_throughput(self, tpu_stats):
+        train_stats = self.throughput.collect(tpu_stats.get('tpu_mxu', None))
+        tpu_stats.update(train_stats)
+        if not self.sbar:
+            self.sbar = self.make_bar('Train Loop: {bar} {desc}', self.colors['tpu_util'], position=4)
+        if 'examples_per_sec' in train_stats and self.throughput.peak_examples_per_sec:
+            self.sbar.n = 100.00 * train_stats['examples_per_sec'] / self.throughput.peak_examples_per_sec
+        else:
+            # no steps in the window, so don't keep showing the last rate
+            self.sbar.n = 0
+        self.sbar.set_description(throughput_str(train_stats), refresh=True)
+
+    def update_sparklines(self, tpu_stats):
+        # read the stats rather than the bars, which skip falsy updates, so drops to 0% still show up
+        now = time.time()
+        width = shutil.get_terminal_size().columns - 8
         if self.profiler_ver == 'v2':
             idle_time = tpu_stats.get('tpu_idle_time', None)
-            if idle_time:
-                self.t2bar.n = (100.00 - idle_time)
-
+            secondary = 100.00 - idle_time if idle_time is not None else None
         else:
-            tpu_mem = tpu_stats.get('tpu_mem_per', None)
-            if tpu_mem:
-                self.t2bar.n = tpu_mem
-                self.t2bar.set_description(tpu_stats.get('tpu_mem_str', ''), refresh=True)
-        
-        cpu_util = self.cpu_utilization()
-        self.cbar.n = cpu_util
-        rperc, rutil, rutilstr = self.ram_utilization()
-        tpu_stats.update({'cpu_util': cpu_util, 'ram_per': rperc, 'ram_util': rutil, 'ram_util_str': rutilstr})
-        self.rbar.n = rperc
-        self.rbar.set_description(rutilstr, refresh=True)
-        self.current_stats = tpu_stats
-        self.refresh_all()
-        if self.timeout_hook:
-            self.check_tpu_pulse(self.current_stats)
-        self.fire_hooks(self.current_stats)
+            secondary = tpu_stats.get('tpu_mem_per', None)
+        values = [tpu_stats.get('tpu_mxu', None), secondary, tpu_stats.get('cpu_util', None), tpu_stats.get('ram_per', None)]
+        for name, value in zip(self.sparklines, values):
+            spark, sparkbar = self.sparklines[name]
+            if spark.width != width:
+                spark.resize(width)
+            points = self.history.pop(name, None) or ([(now, value)] if value is not None else None)
+            if points:
+                spark.add(points)
+            sparkbar.set_description_str(f'{name:>6} {spark.render()}')
+
+    def step(self, n_examples=None, n_steps=1):
+        self.throughput.step(n_examples, n_steps)
+
+    def track(self, iterable, batch_size=None):
+        return self.throughput.track(iterable, batch_size)
 
     def refresh_all(self):
+        if self.panel:
+            self.panel.render()
+            return
         if (self.idx+1) % 10 == 0:
             self.clearbars()
         self.tbar.refresh()
         self.t2bar.refresh()
         self.cbar.refresh()
         self.rbar.refresh()
+        if self.sbar:
+            self.sbar.refresh()
+        for _, sparkbar in self.sparklines.values():
+            sparkbar.refresh()
 
     def log(self, message):
         if not isinstance(message, str):
             message = str(message)
         message = message + '\n' + ('------' * 15)
-        self.tbar.write(message)
+        if getattr(self, 'tbar', None):
+            self.tbar.write(message)
+        else:
+            tqdm.write(message, file=self.fileout)
     
     def reroute_print(self, printer):
         printer = self.log
@@ -140,48 +288,74 @@ class TPUMonitor:
 
     def background(self):
         while self.alive:
-            with self._lock:
-                try:
+            try:
+                with self._lock:
                     self.update()
-                    time.sleep(self.refresh_secs)
-                
-                except KeyboardInterrupt:
-                    self.log('Exiting')
-                    self.alive = False
-                    self.closebars()
-                
-                except Exception as e:
-                    if self.verbose:
-                        self.log(f'Error Encountered. Pausing. Error: {str(e)}')
-                    if self.timeout_hook:
-                        self.check_tpu_pulse()
+                time.sleep(self.refresh_secs)
+            
+            except KeyboardInterrupt:
+                self.log('Exiting')
+                self.alive = False
+                self.closebars()
+            
+            except Exception as e:
+                if self.verbose:
+                    self.log(f'Error Encountered. Pausing. Error: {str(e)}')
+                if self.timeout_hook:
+                    self.check_tpu_pulse()
 
-                    time.sleep(60)
-                    pass
-                if not self.alive:
-                    break
+                time.sleep(60)
+                pass
+            if not self.alive:
+                break
 
     def hwdata(self):
+        if self.attached:
+            self.cpu = self.client.header['cpu']
+            return
         cpu_data = queryhw()
         self.cpu = cpu_data['name'].replace('CPU', '').strip() + ' ' + str(cpu_data['cores']) + 'vCPU/' + str(cpu_data['threads']) + ' Threads'
 
     def tpu_util(self):
-        stats = {'tpu_idle_time': 100.00, 'tpu_idle_str': '', 'tpu_mxu': 0.00, 'tpu_mxu_str': ''}
-        util = self.tpu_utilization(self.service_addr, self.duration_ms, self.monitoring_level)
-        util = util.split('\n')
-        for stat in util:
-            if 'TPU idle time' in stat:
-                stats['tpu_idle_time'] = float(stat.split(':')[-1].replace('%','').strip())
-                stats['tpu_idle_str'] = stat.split('  ')[-1].strip()
-            elif 'Utilization of TPU' in stat:
-                stats['tpu_mxu'] = float(stat.split(':')[-1].replace('%','').strip())
-                stats['tpu_mxu_str'] = ' ' + stat.strip()
+        if self.prober:
+            return self.tpu_util_workers()
+        with self.timer.stage('rpc'):
+            util = self.tpu_utilization(self.service_addr, self.duration_ms, self.monitoring_level)
+        with self.timer.stage('parse'):
+            stats = parse_tpu_utilization(util)
         return stats
+
+    def tpu_util_workers(self):
+        # the master goes through the same bounded pool and deadline as every other worker
+        with self.timer.stage('workers'):
+            results = self.prober.probe_all()
+        master = results.get(self.service_addr, None)
+        if master:
+            stats = dict(master)
+            stats.pop('latency_ms', None)
+        else:
+            responsive = [r for r in results.values() if r]
+            if not responsive:
+                raise RuntimeError(f'No TPU workers responded within {self.prober.timeout_secs} secs')
+            stats = {
+                'tpu_idle_time': sum(r['tpu_idle_time'] for r in responsive) / len(responsive),
+                'tpu_idle_str': '',
+                'tpu_mxu': sum(r['tpu_mxu'] for r in responsive) / len(responsive),
+                'tpu_mxu_str': '',
+            }
+        stats.update(self.prober.worker_stats(results))
+        return stats
+
+    def probe_worker(self, worker):
+        return parse_tpu_utilization(self.tpu_utilization(worker, self.duration_ms, self.monitoring_level))
     
     def tpu_api(self):
-        mxu = self.monitor('tpu_core_mxu')
+        when = utc()
+        mxu = self.monitor('tpu_core_mxu', when=when)
         for x, lst in mxu.items():
             curr_mxu = lst[0][-1]
+        if self.sparklines:
+            self.history['MXU'] = [(when - secs_ago, value) for secs_ago, value in lst]
         mem = self.monitor('tpu_container_mem')
         for x, lst in mem.items():
             curr_mem = lst[0][-1]
@@ -205,17 +379,54 @@ class TPUMonitor:
             'tpu_vm_cpu_per': curr_cpu,
             'tpu_host_cpu_per': curr_tpucpu,
         }
+        if self.io_stats:
+            stats.update(self.io_rates())
         return stats
 
+    def cached_rate(self, metric, **kwargs):
+        # refetch only once the newest point is a full sample period old, and then at most every _counter_retry_secs
+        when = utc()
+        cached = self._rate_cache.get(metric, None)
+        if cached:
+            fetched_at, newest, rate = cached
+            if when - newest < _counter_sample_secs or when - fetched_at < _counter_retry_secs:
+                return rate
+        rates = self.monitor.get_rates(metric, interval=make_interval(_counter_window_secs), when=when, **kwargs)
+        ages = [series[-1][0] for series in rates.values() if series]
+        newest = when - min(ages) if ages else 0
+        rate = latest_total_rate(rates)
+        self._rate_cache[metric] = (when, newest, rate)
+        return rate
+
+    def io_rates(self):
+        vm_filters = [['metric.labels.instance_name', self.hostname]]
+        tpu_net_recv = self.cached_rate('tpu_host_net_recv', node_id=self.tpu_name)
+        vm_net_recv = self.cached_rate('vm_net_recv', filters=vm_filters)
+        vm_disk_read = self.cached_rate('vm_disk_read', filters=vm_filters)
+        _, tpu_net_str = FormatSize(tpu_net_recv)
+        _, vm_net_str = FormatSize(vm_net_recv)
+        _, vm_disk_str = FormatSize(vm_disk_read)
+        return {
+            'tpu_host_net_recv_rate': tpu_net_recv,
+            'vm_net_recv_rate': vm_net_recv,
+            'vm_disk_read_rate': vm_disk_read,
+            'io_str': f'| Input: TPU Host Net {tpu_net_str}/s, VM Net {vm_net_str}/s, VM Disk {vm_disk_str}/s',
+        }
+
     def tpu_init_tf1(self, tpu_name=None, project=None):
         if tpu_name:
             os.environ['TPU_NAME'] = tpu_name
         tpu_config = tpunicorn_query(project)
         self.monitor = TimeSeriesMonitor(project_id=project)
+        self.monitor.timer = self.timer
+        self.tpu_name = tpu_config['name']
+        self.hostname = socket.gethostname()
+        self._rate_cache = {}
         self.mesh = tpu_config['mesh']
         self.tpu_max_mem = _mesh_memory[self.mesh]
         self.profiler_ver = 'v1'
         self.tpu_profiler = self.tpu_api
+        self.prober = None
 
     def tpu_init_tf2(self, tpu_name=None):
         tpu_name = tpu_name or os.environ.get('TPU_NAME', None)
@@ -225,6 +436,10 @@ class TPUMonitor:
         self.workers_list = get_workers_list(tpu_cluster_resolver)
         self.monitoring_level = 2
         self.duration_ms = 1000
+        workers = self.workers_list.split(',')
+        if self.service_addr not in workers:
+            workers.append(self.service_addr)
+        self.prober = WorkerProber(workers, self.probe_worker) if len(workers) > 1 else None
         util = self.tpu_utilization(self.service_addr, self.duration_ms, self.monitoring_level)
         util = util.split('\n')
         mesh_type = {'v': 'v2', 'cores': 8}
@@ -242,6 +457,31 @@ class TPUMonitor:
         self.profiler_ver = 'v2'
         self.tpu_profiler = self.tpu_util
 
+    def tpu_attach(self, socket_path=None, client=None):
+        self.client = client or SnapshotClient(socket_path)
+        self.mesh = self.client.header['mesh']
+        self.tpu_max_mem = self.client.header['tpu_max_mem']
+        self.profiler_ver = self.client.header['profiler_ver']
+        self.tpu_profiler = self.client
+        self.prober = None
+        self.attached = True
+
+    def serve(self, socket_path=None):
+        server = SnapshotServer(self, socket_path or default_socket_path(self.tpu_name))
+        # only keep it once it owns the socket, so close() never removes another server's socket
+        server.start()
+        self.server = server
+        self.add_hook('tpubar_server', self.server.publish, freq=1)
+        return self.server
+
+    def stage_stats(self):
+        return self.timer.stats()
+
+    def export_tensorboard(self, logdir, fields=None, freq=1, flush_secs=30):
+        self.tensorboard = TensorBoardExporter(logdir, fields=fields, flush_secs=flush_secs)
+        self.add_hook('tensorboard', self.tensorboard, freq=freq)
+        return self.tensorboard
+
     def get_time(self, fmt='mins'):
         _stoptime = time.time()
         total_time = _stoptime - self.time
@@ -286,7 +526,7 @@ class TPUMonitor:
         self.log(f'Created timeout hook. Will invoke after {float(num_timeouts) * self.refresh_secs} secs if TPU falls below {min_mxu} after the first TPU Pulse.')
 
     def add_hook(self, name, hook, freq=10):
-        self.hooks[name] = {'freq': freq, 'function': hook}
+        self.hooks[name] = {'freq': freq, 'func': hook}
         self.log(f'Added new hook {name}. Will call hook once every {freq} updates.')
 
     def rm_hook(self, name):
@@ -340,9 +580,26 @@ class TPUMonitor:
         self.t2bar.clear()
         self.cbar.clear()
         self.rbar.clear()
+        if self.sbar:
+            self.sbar.clear()
+        for _, sparkbar in self.sparklines.values():
+            sparkbar.clear()
     
     def close(self, *_):
+        stats = self._snapshot.stats
+        if self.attached and 'tpu_mxu_hours' in stats:
+            self.log(efficiency_summary(stats))
+        elif self.accounting.last:
+            self.log(self.accounting.summary())
         self.closebars()
+        if self.server:
+            self.server.close()
+        if self.prober:
+            self.prober.close()
+        if self.tensorboard:
+            self.tensorboard.close()
+        if self.attached:
+            self.client.close()
 
     def closebars(self):
         self.alive = False
@@ -350,6 +607,12 @@ class TPUMonitor:
         self.t2bar.close()
         self.cbar.close()
         self.rbar.close()
+        if self.sbar:
+            self.sbar.close()
+        for _, sparkbar in self.sparklines.values():
+            sparkbar.close()
+        if self.panel:
+            self.panel.render(force=True)
 
     def __exit__(self, *_):
         self.closebars()
@@ -8,11 +8,17 @@ import simdjson as json
 import time
 
 import google.auth
+import google.auth.credentials
+import google.auth.transport.requests
 
 from datetime import datetime
+from threading import Thread, Lock, Event
 from google.cloud import monitoring_v3
+from google.cloud.monitoring_v3.services.metric_service.transports import MetricServiceGrpcTransport
 from google.protobuf.json_format import MessageToJson
 from tpubar import env
+from tpubar.rates import decode_rates
+from tpubar.profiling import StageTimer
 
 if env['profiler']:
     from tensorflow.python.framework import errors
@@ -128,23 +134,120 @@ labelers = {
 }
 
 
+def make_interval(window_secs=1200, end=None):
+    if end is None:
+        end = time.time()
+    seconds = int(end)
+    nanos = int((end - seconds) * 10 ** 9)
+    return monitoring_v3.TimeInterval(
+        {
+            "end_time": {"seconds": seconds, "nanos": nanos},
+            "start_time": {"seconds": (seconds - int(window_secs)), "nanos": nanos},
+        }
+    )
+
+
 def get_time_series_label(ts, **options):
     return labelers[ts.metric.type](ts, **options)
 
+_pool_lock = Lock()
+_default_credentials = {}
+_client_pool = {}
+# [(credentials, scoped, refresher)]: matched by identity and kept alive by the pool, so the index is a stable key
+_pooled_credentials = []
+
+
+class CredentialRefresher(Thread):
+    """Refreshes an access token shortly before it expires, so RPCs never wait on a token refresh."""
+    def __init__(self, credentials, margin_secs=300, retry_secs=60, max_wait_secs=3600):
+        super().__init__(daemon=True)
+        self.credentials = credentials
+        self.margin_secs = margin_secs
+        self.retry_secs = retry_secs
+        self.max_wait_secs = max_wait_secs
+        self.request = google.auth.transport.requests.Request()
+        # not _stop, which would shadow Thread._stop and break join(), is_alive() and fork handling
+        self._stopped = Event()
+
+    def run(self):
+        wait = 0
+        while not self._stopped.wait(wait):
+            try:
+                if not self.credentials.valid or self.expires_in() <= self.margin_secs:
+                    self.credentials.refresh(self.request)
+                wait = min(max(self.expires_in() - self.margin_secs, self.retry_secs), self.max_wait_secs)
+            except Exception:
+                wait = self.retry_secs
+
+    def expires_in(self):
+        expiry = getattr(self.credentials, 'expiry', None)
+        if expiry is None:
+            return float('inf')
+        return (expiry - datetime.utcnow()).total_seconds()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def get_default_credentials():
+    with _pool_lock:
+        if not _default_credentials:
+            credentials, project_id = google.auth.default()
+            _default_credentials.update({'credentials': credentials, 'project_id': project_id})
+        return _default_credentials['credentials'], _default_credentials['project_id']
+
+
 def get_default_project_id():
-    _, project_id = google.auth.default()
+    _, project_id = get_default_credentials()
     return project_id
 
+
+def pool_credentials(credentials):
+    # must be called with _pool_lock held. Service account keys need scopes, and the client would scope its own copy,
+    # so they are scoped here once and that object is shared by the refresher and the client's channel
+    for idx, (pooled, scoped, _) in enumerate(_pooled_credentials):
+        if pooled is credentials:
+            return idx, scoped
+    scoped = google.auth.credentials.with_scopes_if_required(credentials, MetricServiceGrpcTransport.AUTH_SCOPES)
+    refresher = CredentialRefresher(scoped)
+    refresher.start()
+    _pooled_credentials.append((credentials, scoped, refresher))
+    return len(_pooled_credentials) - 1, scoped
+
+
+def get_metric_client(project_id=None, credentials=None):
+    if credentials is None:
+        credentials, _ = get_default_credentials()
+    with _pool_lock:
+        idx, scoped = pool_credentials(credentials)
+        key = (idx, project_id)
+        if key not in _client_pool:
+            # passing credentials= would let the transport swap in a copy, so build the channel on the refreshed object
+            channel = MetricServiceGrpcTransport.create_channel(credentials=scoped)
+            _client_pool[key] = monitoring_v3.MetricServiceClient(transport=MetricServiceGrpcTransport(channel=channel))
+        return _client_pool[key]
+
+
+def clear_client_pool():
+    with _pool_lock:
+        for _, _, refresher in _pooled_credentials:
+            refresher.stop()
+        _pooled_credentials.clear()
+        _default_credentials.clear()
+        _client_pool.clear()
+
+
 class TimeSeriesMonitor:
-    def __init__(self, project_id=None, client=None):
+    def __init__(self, project_id=None, client=None, credentials=None):
         if project_id is None:
             project_id = get_default_project_id()
         elif project_id in ['tfork', 'tensorfork']:
             project_id = 'gpt-2-15b-poetry'
         self.project_id = project_id
         if client is None:
-            client = monitoring_v3.MetricServiceClient()
+            client = get_metric_client(project_id, credentials)
         self.client = client
+        self.timer = StageTimer()
 
     def __call__(self, *args, **kwargs):
         return self.get(*args, **kwargs)
@@ -157,15 +260,7 @@ class TimeSeriesMonitor:
             metric = metrics[metric]
 
         if interval is None:
-            now = time.time()
-            seconds = int(now)
-            nanos = int((now - seconds) * 10 ** 9)
-            interval = monitoring_v3.TimeInterval(
-                {
-                    "end_time": {"seconds": seconds, "nanos": nanos},
-                    "start_time": {"seconds": (seconds - 1200), "nanos": nanos},
-                }
-            )
+            interval = make_interval(1200)
 
         if filters is None:
             filters = []
@@ -175,30 +270,40 @@ class TimeSeriesMonitor:
         filters += [['metric.type', metric]]
         filters = ' AND '.join(['{} = {}'.format(k, json.dumps(v)) for k, v in filters])
 
-        results = self.client.list_time_series(
-            request={
-                "name": "projects/{project_id}".format(project_id=self.project_id),
-                "filter": filters,
-                "interval": interval,
-                "view": monitoring_v3.ListTimeSeriesRequest.TimeSeriesView.FULL,
-            }
-        )
+        with self.timer.stage('rpc'):
+            results = self.client.list_time_series(
+                request={
+                    "name": "projects/{project_id}".format(project_id=self.project_id),
+                    "filter": filters,
+                    "interval": interval,
+                    "view": monitoring_v3.ListTimeSeriesRequest.TimeSeriesView.FULL,
+                }
+            )
         if raw:
             return results
-        points = collections.defaultdict(lambda: [])
-        for timeSeries in results:
-            key = get_time_series_label(timeSeries, short=not full_names)
-        for point in timeSeries.points:
-            point_utc = point.interval.start_time.timestamp()
-            seconds_ago = int(when - point_utc)
-            if timeSeries.value_type == 2: # what's the correct way to get INT64 here?
-                value = point.value.int64_value
-            else:
-                value = point.value.double_value
-            points[key].append([seconds_ago, value])
-        points = dict(points)
+        with self.timer.stage('decode'):
+            points = collections.defaultdict(lambda: [])
+            for timeSeries in results:
+                key = get_time_series_label(timeSeries, short=not full_names)
+                for point in timeSeries.points:
+                    point_utc = point.interval.start_time.timestamp()
+                    seconds_ago = int(when - point_utc)
+                    if timeSeries.value_type == 2: # what's the correct way to get INT64 here?
+                        value = point.value.int64_value
+                    else:
+                        value = point.value.double_value
+                    points[key].append([seconds_ago, value])
+            points = dict(points)
         return points
 
+    def get_rates(self, metric="vm_net_recv", node_id=None, interval=None, filters=None, when=None, full_names=False):
+        """Converts a *_bytes_count metric into per series [seconds_ago, bytes/sec] lists, oldest first"""
+        if when is None:
+            when = utc()
+        results = self.get(metric, node_id=node_id, interval=interval, filters=filters, raw=True)
+        with self.timer.stage('decode'):
+            return decode_rates(results, when, lambda series: get_time_series_label(series, short=not full_names))
+
 
 def get_workers_list(cluster_resolver):
     worker_job_name = 'worker'
@@ -0,0 +1,124 @@
+import sys
+import time
+import html
+import collections
+
+from threading import Lock, Timer
+
+from tpubar import env
+
+
+def in_notebook():
+    if env['colab']:
+        return True
+    if 'IPython' not in sys.modules:
+        return False
+    from IPython import get_ipython
+    shell = get_ipython()
+    return shell is not None and 'IPKernelApp' in shell.config
+
+
+def notebook_available():
+    try:
+        import ipywidgets
+        from IPython.display import display
+    except ImportError:
+        return False
+    return in_notebook()
+
+
+class PanelBar:
+    """Stands in for a tqdm bar inside a NotebookPanel. Setting values only marks the panel dirty."""
+    def __init__(self, panel, bar_format, colour=None, total=100):
+        self.panel = panel
+        self.bar_format = bar_format
+        self.colour = colour or 'green'
+        self.total = total
+        self.n = 0
+        self.desc = ''
+
+    def set_description(self, desc='', refresh=True):
+        self.desc = desc + ': ' if desc else ''
+
+    def set_description_str(self, desc='', refresh=True):
+        self.desc = desc
+
+    def write(self, message):
+        self.panel.log(message)
+
+    def refresh(self):
+        pass
+
+    def clear(self):
+        pass
+
+    def close(self):
+        # the panel keeps showing the final values after the monitor closes
+        pass
+
+    def to_html(self):
+        percentage = 100.00 * self.n / self.total if self.total else 0.00
+        bar = ''
+        if self.total:
+            bar = (f'<span style="display:inline-block;width:30%;height:0.9em;background:#ddd;vertical-align:middle">'
+                   f'<span style="display:block;height:100%;width:{min(max(percentage, 0.00), 100.00):.2f}%;background:{html.escape(self.colour)}"></span></span>')
+        row = self.bar_format.replace('{bar}', '\0')
+        row = row.format(desc=self.desc, percentage=percentage)
+        return html.escape(row).replace('\0', bar)
+
+
+class NotebookPanel:
+    """Renders every bar as one HTML widget and pushes at most one update per `min_interval` secs.
+
+    Renders requested inside `min_interval` of the last one are coalesced into a single trailing
+    render when the interval ends, so the final state and new log lines always show up. The
+    widget is displayed once and then only its value is replaced, and log lines are kept in a
+    bounded buffer, so the output cell stays the same size however long the run is.
+    """
+    def __init__(self, min_interval=1.0, max_log_lines=10):
+        import ipywidgets
+        from IPython.display import display
+        self.min_interval = min_interval
+        self.bars = []
+        self.logs = collections.deque(maxlen=max_log_lines)
+        self.last_render = 0.00
+        self.dirty = False
+        self._flush_timer = None
+        self._lock = Lock()
+        self.widget = ipywidgets.HTML()
+        display(self.widget)
+
+    def bar(self, bar_format, colour=None, total=100):
+        bar = PanelBar(self, bar_format, colour, total)
+        self.bars.append(bar)
+        return bar
+
+    def log(self, message):
+        self.logs.append(message)
+        self.render()
+
+    def flush(self):
+        with self._lock:
+            self._flush_timer = None
+            dirty = self.dirty
+        if dirty:
+            self.render(force=True)
+
+    def render(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            wait = self.min_interval - (now - self.last_render)
+            if not force and wait > 0:
+                self.dirty = True
+                if not self._flush_timer:
+                    self._flush_timer = Timer(wait, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+            rows = [f'<div style="white-space:pre;font-family:monospace">{bar.to_html()}</div>' for bar in self.bars]
+            if self.logs:
+                logs = html.escape('\n'.join(self.logs))
+                rows.append(f'<div style="white-space:pre;font-family:monospace;color:#888">{logs}</div>')
+            self.widget.value = ''.join(rows)
+            self.last_render = now
+            self.dirty = False
@@ -0,0 +1,76 @@
+import time
+import collections
+
+
+class _NoStage:
+    # contextlib.nullcontext needs 3.7+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+
+_disabled_stage = _NoStage()
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+
+
+class StageTimer:
+    """Rolling per stage timings of the monitor's poll loop.
+
+    Keeps the last `history` durations of each stage. When disabled, `stage` returns a shared
+    no-op context manager, so instrumented code pays a single attribute check.
+    """
+    def __init__(self, enabled=False, history=256):
+        self.enabled = enabled
+        self.history = history
+        self.samples = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return _disabled_stage
+        return _Stage(self, name)
+
+    def record(self, name, secs):
+        if name not in self.samples:
+            self.samples[name] = collections.deque(maxlen=self.history)
+        self.samples[name].append(secs)
+
+    def stats(self):
+        stats = {}
+        for name, samples in list(self.samples.items()):
+            times = sorted(samples)
+            if not times:
+                continue
+            stats[name] = {
+                'count': len(times),
+                'p50_ms': 1000 * times[len(times) // 2],
+                'p95_ms': 1000 * times[min(int(len(times) * 0.95), len(times) - 1)],
+                'max_ms': 1000 * times[-1],
+            }
+        return stats
+
+    def report_str(self):
+        stats = self.stats()
+        if not stats:
+            return 'No poll stages recorded yet'
+        lines = [f'TPUBar poll stage timings (last {self.history} samples per stage)']
+        for name, s in sorted(stats.items(), key=lambda x: -x[1]['p50_ms']):
+            lines.append(f"- {name:<12} p50 {s['p50_ms']:8.2f}ms | p95 {s['p95_ms']:8.2f}ms | max {s['max_ms']:8.2f}ms")
+        return '\n'.join(lines)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from google.api.metric_pb2 import MetricDescriptor
+
+
+def delta_rate(start_times, end_times, values):
+    # DELTA points hold the count over their own [start, end] interval
+    start_times, end_times, values = (np.asarray(a, dtype=float) for a in (start_times, end_times, values))
+    duration = end_times - start_times
+    valid = duration > 0
+    return end_times[valid], values[valid] / duration[valid]
+
+
+def cumulative_rate(start_times, end_times, values):
+    # CUMULATIVE points hold the count since start_time; a new start_time or a drop in value is a reset
+    start_times, end_times, values = (np.asarray(a, dtype=float) for a in (start_times, end_times, values))
+    order = np.argsort(end_times)
+    start_times, end_times, values = start_times[order], end_times[order], values[order]
+    dt = np.diff(end_times)
+    dv = np.diff(values)
+    reset = (dv < 0) | (start_times[1:] != start_times[:-1])
+    # after a reset the counter only holds what accumulated since its new start
+    dv[reset] = values[1:][reset]
+    dt[reset] = (end_times[1:] - np.maximum(start_times[1:], end_times[:-1]))[reset]
+    valid = dt > 0
+    return end_times[1:][valid], dv[valid] / dt[valid]
+
+
+def counter_rate(start_times, end_times, values, kind='delta'):
+    if len(values) == 0 or (kind == 'cumulative' and len(values) < 2):
+        return np.empty(0), np.empty(0)
+    if kind == 'cumulative':
+        return cumulative_rate(start_times, end_times, values)
+    return delta_rate(start_times, end_times, values)
+
+
+def decode_rates(results, when, labeler):
+    """Converts monitoring_v3 TimeSeries of a counter metric into {label: [[seconds_ago, bytes/sec], ...]}, oldest first.
+
+    Series that get the same label (e.g. the loadbalanced=true and false series of an instance's
+    received_bytes_count) are kept under numbered keys instead of overwriting each other.
+    """
+    rates = {}
+    for series in results:
+        key = labeler(series)
+        kind = 'cumulative' if series.metric_kind == MetricDescriptor.MetricKind.CUMULATIVE else 'delta'
+        int64 = series.value_type == MetricDescriptor.ValueType.INT64
+        starts, ends, values = [], [], []
+        for point in series.points:
+            starts.append(point.interval.start_time.timestamp())
+            ends.append(point.interval.end_time.timestamp())
+            values.append(point.value.int64_value if int64 else point.value.double_value)
+        times, series_rates = counter_rate(starts, ends, values, kind=kind)
+        order = times.argsort()
+        if key in rates:
+            n = 2
+            while f'{key}/{n}' in rates:
+                n += 1
+            key = f'{key}/{n}'
+        rates[key] = [[int(when - t), r] for t, r in zip(times[order], series_rates[order])]
+    return rates
+
+
+def latest_total_rate(rates):
+    # sum the most recent rate of every series (e.g. every NIC, disk or TPU worker) from TimeSeriesMonitor.get_rates
+    return sum(series[-1][1] for series in rates.values() if series)
@@ -0,0 +1,167 @@
+import os
+import time
+import json
+import socket
+import tempfile
+
+from threading import Thread, Lock
+
+
+def default_socket_path(tpu_name=None):
+    tpu_name = tpu_name or os.environ.get('TPU_NAME', None) or 'default'
+    return os.path.join(tempfile.gettempdir(), f'tpubar-{tpu_name}.sock')
+
+
+def encode_message(message):
+    return (json.dumps(message) + '\n').encode('utf8')
+
+
+def server_running(socket_path, timeout=1.0):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(timeout)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class SnapshotServer:
+    """Publishes a collector's stats to any number of attached clients over a Unix socket.
+
+    Each snapshot is serialized once and written to every client, so adding viewers
+    does not add any Cloud Monitoring or profiler traffic. Starting on a socket another
+    server is still answering raises, so there is only ever one collector per socket.
+    """
+    def __init__(self, monitor, socket_path=None, client_timeout=1.0):
+        self.monitor = monitor
+        self.socket_path = socket_path or default_socket_path()
+        self.client_timeout = client_timeout
+        self.clients = []
+        self.last_message = None
+        self.alive = False
+        self._lock = Lock()
+        self._sock = None
+
+    @property
+    def header(self):
+        return {
+            'type': 'header',
+            'mesh': self.monitor.mesh,
+            'profiler_ver': self.monitor.profiler_ver,
+            'tpu_max_mem': self.monitor.tpu_max_mem,
+            'cpu': self.monitor.cpu,
+            'refresh_secs': self.monitor.refresh_secs,
+        }
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            if server_running(self.socket_path):
+                raise RuntimeError(f'A TPUBar server is already running on {self.socket_path}. Attach to it with "tpubar monitor --attach"')
+            # left behind by a server that exited without cleaning up
+            os.remove(self.socket_path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen()
+        self.alive = True
+        _accept = Thread(target=self.accept_clients, daemon=True)
+        _accept.start()
+
+    def accept_clients(self):
+        while self.alive:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            conn.settimeout(self.client_timeout)
+            try:
+                conn.sendall(encode_message(self.header))
+                if self.last_message:
+                    conn.sendall(self.last_message)
+            except OSError:
+                conn.close()
+                continue
+            with self._lock:
+                self.clients.append(conn)
+
+    def publish(self, stats):
+        self.last_message = encode_message({'type': 'stats', 'timestamp': time.time(), 'stats': stats})
+        with self._lock:
+            clients = self.clients[:]
+        dropped = []
+        for conn in clients:
+            try:
+                conn.sendall(self.last_message)
+            except OSError:
+                dropped.append(conn)
+        if dropped:
+            with self._lock:
+                for conn in dropped:
+                    conn.close()
+                    if conn in self.clients:
+                        self.clients.remove(conn)
+
+    def close(self):
+        self.alive = False
+        with self._lock:
+            for conn in self.clients:
+                conn.close()
+            self.clients = []
+        if self._sock:
+            self._sock.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class SnapshotClient:
+    """Reads snapshots published by a SnapshotServer. Calling it returns the latest stats.
+
+    If no snapshot arrives for `stale_refreshes` of the server's refresh periods, calling it
+    raises, so a hung daemon shows up as an error instead of a frozen display.
+    """
+    def __init__(self, socket_path=None, connect_timeout=10, stale_refreshes=5):
+        self.socket_path = socket_path or default_socket_path()
+        self.stale_refreshes = stale_refreshes
+        self.header = None
+        self.latest = None
+        self.timestamp = None
+        self.connected = False
+        self._sock = None
+        self.connect(connect_timeout)
+
+    def connect(self, timeout=10):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.socket_path)
+        reader = self._sock.makefile('r', encoding='utf8')
+        self._sock.settimeout(timeout)
+        self.header = json.loads(reader.readline())
+        self._sock.settimeout(None)
+        self.connected = True
+        _reader = Thread(target=self.read_snapshots, args=(reader,), daemon=True)
+        _reader.start()
+
+    def read_snapshots(self, reader):
+        try:
+            for line in reader:
+                message = json.loads(line)
+                if message.get('type') == 'stats':
+                    self.latest = message['stats']
+                    self.timestamp = message['timestamp']
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+
+    def __call__(self):
+        if not self.connected:
+            self.connect()
+        max_age = self.stale_refreshes * self.header.get('refresh_secs', 10)
+        if self.timestamp and time.time() - self.timestamp > max_age:
+            raise RuntimeError(f'TPUBar server at {self.socket_path} has not published stats for {time.time() - self.timestamp:.0f} secs')
+        return dict(self.latest) if self.latest else {}
+
+    def close(self):
+        self.connected = False
+        if self._sock:
+            self._sock.close()
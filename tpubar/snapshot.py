@@ -0,0 +1,56 @@
+from types import MappingProxyType
+
+
+_sample_fields = ('tpu_mxu', 'tpu_idle_time', 'tpu_mem_per', 'cpu_util', 'ram_per', 'steps_per_sec', 'examples_per_sec', 'tpu_mxu_hours', 'tpu_idle_hours')
+
+
+class StatsSample:
+    """One immutable, timestamped poll result.
+
+    The common fields are fixed slots (None if not collected), and everything else is
+    available through `stats`, a read-only view of the poll's dict. Assigning to a sample
+    raises. The monitor publishes a new sample by swapping a single reference, which is
+    atomic in CPython, so readers get a consistent sample without taking the monitor's lock.
+    """
+    __slots__ = ('seq', 'timestamp', 'stats') + _sample_fields
+
+    def __init__(self, seq, timestamp, stats, tpu_mxu=None, tpu_idle_time=None, tpu_mem_per=None, cpu_util=None, ram_per=None,
+                 steps_per_sec=None, examples_per_sec=None, tpu_mxu_hours=None, tpu_idle_hours=None):
+        _set = object.__setattr__
+        _set(self, 'seq', seq)
+        _set(self, 'timestamp', timestamp)
+        # the monitor hands over a dict it never touches again, so a proxy is enough to keep it read-only
+        _set(self, 'stats', MappingProxyType(stats))
+        _set(self, 'tpu_mxu', tpu_mxu)
+        _set(self, 'tpu_idle_time', tpu_idle_time)
+        _set(self, 'tpu_mem_per', tpu_mem_per)
+        _set(self, 'cpu_util', cpu_util)
+        _set(self, 'ram_per', ram_per)
+        _set(self, 'steps_per_sec', steps_per_sec)
+        _set(self, 'examples_per_sec', examples_per_sec)
+        _set(self, 'tpu_mxu_hours', tpu_mxu_hours)
+        _set(self, 'tpu_idle_hours', tpu_idle_hours)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('StatsSample is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('StatsSample is immutable')
+
+    def __getitem__(self, key):
+        return self.stats[key]
+
+    def get(self, key, default=None):
+        return self.stats.get(key, default)
+
+    def as_dict(self):
+        # a fresh dict each call, safe to mutate, pickle or serialize
+        return dict(self.stats)
+
+    def __repr__(self):
+        fields = [f'seq={self.seq}', f'timestamp={self.timestamp:.3f}']
+        fields += [f'{f}={getattr(self, f)!r}' for f in _sample_fields if getattr(self, f) is not None]
+        return f"StatsSample({', '.join(fields)})"
+
+
+empty_sample = StatsSample(0, 0.00, {})
@@ -0,0 +1,107 @@
+import bisect
+import numpy as np
+
+
+_blocks = ' ▁▂▃▄▅▆▇█'
+
+
+def triangle_areas(ax, ay, x, y, cx, cy):
+    return np.abs((ax - cx) * (y - ay) - (ax - x) * (cy - ay))
+
+
+class Sparkline:
+    """Rolling LTTB sparkline over the last `window_secs` seconds of a metric.
+
+    Points are bucketed on a fixed time grid (one bucket per character), and each bucket keeps
+    the point LTTB selects for it. A bucket's selection only depends on the previous selection and
+    the next bucket's mean, so new points only re-select the buckets from the first one they touch
+    to the end instead of re-downsampling the whole window.
+    """
+    def __init__(self, window_secs=1200, width=60, vmin=None, vmax=None):
+        self.window_secs = window_secs
+        self.vmin = vmin
+        self.vmax = vmax
+        # time sorted points; entries before self.start have been evicted and are compacted lazily
+        self.t = []
+        self.v = []
+        self.start = 0
+        self.last_t = float('-inf')
+        self.resize(width)
+
+    def resize(self, width):
+        self.width = max(int(width), 3)
+        self.bucket_secs = self.window_secs / self.width
+        self.selected = {}
+        if len(self.t) > self.start:
+            self.reselect(self.bucket(self.t[self.start]))
+
+    def bucket(self, t):
+        return int(t // self.bucket_secs)
+
+    def add(self, points):
+        points = sorted(p for p in points if p[0] > self.last_t)
+        if not points:
+            return
+        for t, v in points:
+            self.t.append(t)
+            self.v.append(v)
+        self.last_t = points[-1][0]
+        cutoff = self.last_t - self.window_secs - self.bucket_secs
+        self.start = bisect.bisect_left(self.t, cutoff, self.start)
+        if self.start > len(self.t) // 2:
+            del self.t[:self.start], self.v[:self.start]
+            self.start = 0
+        first = self.bucket(self.t[self.start])
+        for b in [b for b in self.selected if b < first]:
+            del self.selected[b]
+        self.reselect(self.bucket(points[0][0]))
+
+    def previous_selection(self, bucket):
+        for b in range(bucket - 1, bucket - self.width - 2, -1):
+            if b in self.selected:
+                return self.selected[b]
+        return None
+
+    def reselect(self, dirty):
+        # the bucket before the first touched one sees a new next-bucket mean, so it is re-selected too,
+        # and only points from that bucket on are converted and scanned
+        lo_idx = bisect.bisect_left(self.t, (dirty - 1) * self.bucket_secs, self.start)
+        t = np.asarray(self.t[lo_idx:], dtype=float)
+        v = np.asarray(self.v[lo_idx:], dtype=float)
+        buckets = np.floor(t / self.bucket_secs).astype(int)
+        ids, starts = np.unique(buckets, return_index=True)
+        ends = np.append(starts[1:], len(t))
+        prev = self.previous_selection(ids[0]) if lo_idx > self.start else None
+        for i in range(len(ids)):
+            lo, hi = starts[i], ends[i]
+            if prev is None:
+                idx = lo
+            elif i + 1 == len(ids):
+                idx = hi - 1
+            else:
+                nlo, nhi = starts[i + 1], ends[i + 1]
+                idx = lo + np.argmax(triangle_areas(prev[0], prev[1], t[lo:hi], v[lo:hi], t[nlo:nhi].mean(), v[nlo:nhi].mean()))
+            prev = self.selected[ids[i]] = (t[idx], v[idx])
+
+    def values(self):
+        if len(self.t) <= self.start:
+            return []
+        last = self.bucket(self.last_t)
+        return [self.selected.get(b, (None, None))[1] for b in range(last - self.width + 1, last + 1)]
+
+    def render(self):
+        values = self.values()
+        present = [v for v in values if v is not None]
+        if not present:
+            return ''
+        vmin = min(present) if self.vmin is None else self.vmin
+        vmax = max(present) if self.vmax is None else self.vmax
+        scale = (len(_blocks) - 2) / (vmax - vmin) if vmax > vmin else 0
+        chars = []
+        for v in values:
+            if v is None:
+                chars.append(_blocks[0])
+            else:
+                level = int(round((min(max(v, vmin), vmax) - vmin) * scale))
+                chars.append(_blocks[1 + level])
+        return ''.join(chars)
@@ -0,0 +1,70 @@
+import time
+import queue
+import numbers
+
+from threading import Thread, Event
+
+
+class TensorBoardExporter:
+    """Writes numeric monitor stats as TensorBoard scalars from a background thread.
+
+    Called as a hook with current_stats. Calls only enqueue, and the writer thread drains the
+    queue in batches every `flush_secs`, so the polling loop never waits on file I/O. If
+    the queue is full the sample is dropped and counted instead of blocking. Each sample keeps
+    the wall time it was recorded at, and its step follows train_steps when monitor.step is used
+    (never going backwards), so the curves line up with loss curves on either axis.
+    """
+    def __init__(self, logdir, fields=None, flush_secs=30, max_queue=10000, prefix='tpubar'):
+        self.logdir = logdir
+        self.fields = fields
+        self.flush_secs = flush_secs
+        self.prefix = prefix
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.count = 0
+        self.step = 0
+        self.dropped = 0
+        self._stop = Event()
+        self._writer = Thread(target=self.write_loop, daemon=True)
+        self._writer.start()
+
+    def __call__(self, stats, *args, **kwargs):
+        if not isinstance(stats, dict):
+            return
+        self.count += 1
+        self.step = max(stats.get('train_steps', 0) or 0, self.step + 1)
+        scalars = {k: float(v) for k, v in stats.items() if isinstance(v, numbers.Number) and not isinstance(v, bool) and (self.fields is None or k in self.fields)}
+        try:
+            self.queue.put_nowait((time.time(), self.step, scalars))
+        except queue.Full:
+            self.dropped += 1
+
+    def drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def write_loop(self):
+        # tf.summary stamps events when they are written, so use tensorboard's event writer to keep the recorded wall time
+        from tensorboard.summary.writer.event_file_writer import EventFileWriter
+        writer = EventFileWriter(self.logdir, flush_secs=self.flush_secs)
+        while not self._stop.wait(self.flush_secs):
+            self.write_batch(writer, self.drain())
+        self.write_batch(writer, self.drain())
+        writer.close()
+
+    def write_batch(self, writer, batch):
+        from tensorboard.compat.proto.event_pb2 import Event
+        from tensorboard.compat.proto.summary_pb2 import Summary
+        if not batch:
+            return
+        for wall_time, step, scalars in batch:
+            values = [Summary.Value(tag=f'{self.prefix}/{name}', simple_value=value) for name, value in scalars.items()]
+            writer.add_event(Event(wall_time=wall_time, step=step, summary=Summary(value=values)))
+        writer.flush()
+
+    def close(self, timeout=30):
+        self._stop.set()
+        self._writer.join(timeout)
@@ -0,0 +1,87 @@
+import time
+import math
+import collections
+
+
+class StepTracker:
+    """Records training loop steps and computes windowed throughput.
+
+    `step` is called from the training loop and only appends to a deque, which is
+    atomic under the GIL, so the fast path never takes a lock. `collect` drains the
+    pending events from the monitor thread and computes the windowed stats. The pending
+    deque is bounded by `max_pending`, so if nothing drains it (monitor not started or
+    backing off after an error) only the newest steps are kept.
+    """
+    def __init__(self, window_secs=60, max_pending=65536):
+        self.window_secs = window_secs
+        self._pending = collections.deque(maxlen=max_pending)
+        self._window = collections.deque()
+        self.total_steps = 0
+        self.total_examples = 0
+        self.peak_examples_per_sec = 0.00
+
+    def step(self, n_examples=None, n_steps=1):
+        self._pending.append((time.perf_counter(), n_steps, n_examples or 0))
+
+    def track(self, iterable, batch_size=None):
+        for item in iterable:
+            yield item
+            self.step(n_examples=batch_size)
+
+    @property
+    def active(self):
+        return bool(self.total_steps or self._pending)
+
+    def drain(self):
+        pending = self._pending
+        while True:
+            try:
+                event = pending.popleft()
+            except IndexError:
+                break
+            self._window.append(event)
+            self.total_steps += event[1]
+            self.total_examples += event[2]
+
+    def collect(self, tpu_mxu=None):
+        self.drain()
+        now = time.perf_counter()
+        window = self._window
+        while window and now - window[0][0] > self.window_secs:
+            window.popleft()
+
+        stats = {'train_steps': self.total_steps, 'train_examples': self.total_examples}
+        if len(window) < 2:
+            return stats
+
+        span = window[-1][0] - window[0][0]
+        # the first event in the window only marks the start of the span
+        steps = sum(e[1] for e in window) - window[0][1]
+        examples = sum(e[2] for e in window) - window[0][2]
+        if span <= 0 or steps <= 0:
+            return stats
+
+        intervals = [(b[0] - a[0]) / b[1] for a, b in zip(window, list(window)[1:]) if b[1]]
+        mean_step = sum(intervals) / len(intervals)
+        jitter = math.sqrt(sum((x - mean_step) ** 2 for x in intervals) / len(intervals))
+        examples_per_sec = examples / span
+        self.peak_examples_per_sec = max(self.peak_examples_per_sec, examples_per_sec)
+
+        stats.update({
+            'steps_per_sec': steps / span,
+            'examples_per_sec': examples_per_sec,
+            'step_time_ms': mean_step * 1000,
+            'step_jitter_ms': jitter * 1000,
+        })
+        if tpu_mxu:
+            stats['examples_per_mxu'] = examples_per_sec / tpu_mxu
+        return stats
+
+
+def throughput_str(stats):
+    if 'steps_per_sec' not in stats:
+        return f"{stats.get('train_steps', 0)} steps"
+    s = f"{stats['steps_per_sec']:.2f} steps/s | {stats['examples_per_sec']:.1f} ex/s | step {stats['step_time_ms']:.1f}±{stats['step_jitter_ms']:.1f}ms"
+    if 'examples_per_mxu' in stats:
+        s += f" | {stats['examples_per_mxu']:.2f} ex/s per MXU%"
+    return s
@@ -0,0 +1,85 @@
+import time
+import statistics
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class WorkerProber:
+    """Probes every worker of a pod slice concurrently, giving each probe `timeout_secs` from when it starts.
+
+    The pool has a thread per worker, and a worker whose previous probe is still running is not
+    probed again, so a hung worker holds only its own thread and is reported as unresponsive
+    instead of delaying the others. A probe still queued at the deadline is reported as unprobed,
+    not as a straggler.
+    """
+    def __init__(self, workers, probe, max_workers=None, timeout_secs=5.0, straggler_mxu=10.00):
+        self.workers = workers
+        self.probe = probe
+        self.timeout_secs = timeout_secs
+        self.straggler_mxu = straggler_mxu
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or len(workers), thread_name_prefix='tpubar-probe')
+        self.pending = {}
+        self.started = {}
+        self.unprobed = []
+
+    def timed_probe(self, worker):
+        start = self.started[worker] = time.perf_counter()
+        stats = self.probe(worker)
+        stats['latency_ms'] = 1000 * (time.perf_counter() - start)
+        return stats
+
+    def submit(self):
+        self.deadline = time.perf_counter() + self.timeout_secs
+        for worker in self.workers:
+            if worker not in self.pending:
+                self.started.pop(worker, None)
+                self.pending[worker] = self.pool.submit(self.timed_probe, worker)
+
+    def collect(self):
+        results = {}
+        self.unprobed = []
+        for worker in self.workers:
+            future = self.pending[worker]
+            while not future.done():
+                # a probe that starts while we wait gets its full timeout from its own start
+                started = self.started.get(worker, None)
+                remaining = (started + self.timeout_secs if started else self.deadline) - time.perf_counter()
+                if remaining <= 0:
+                    break
+                wait([future], timeout=remaining)
+            if not future.done():
+                if worker not in self.started:
+                    self.unprobed.append(worker)
+                results[worker] = None
+                continue
+            self.pending.pop(worker)
+            try:
+                results[worker] = future.result()
+            except Exception:
+                results[worker] = None
+        return results
+
+    def probe_all(self):
+        self.submit()
+        return self.collect()
+
+    def worker_stats(self, results):
+        responsive = {w: r for w, r in results.items() if r}
+        stats = {'tpu_workers': results, 'tpu_stragglers': [w for w, r in results.items() if not r and w not in self.unprobed]}
+        if self.unprobed:
+            stats['tpu_unprobed_workers'] = list(self.unprobed)
+        if not responsive:
+            return stats
+        mxus = [r['tpu_mxu'] for r in responsive.values()]
+        idles = [r['tpu_idle_time'] for r in responsive.values()]
+        median_mxu = statistics.median(mxus)
+        stats.update({
+            'tpu_worker_mxu_skew': max(mxus) - min(mxus),
+            'tpu_worker_idle_skew': max(idles) - min(idles),
+            'tpu_worker_max_latency_ms': max(r['latency_ms'] for r in responsive.values()),
+        })
+        stats['tpu_stragglers'] += [w for w, r in responsive.items() if median_mxu - r['tpu_mxu'] > self.straggler_mxu]
+        return stats
+
+    def close(self):
+        self.pool.shutdown(wait=False)